@@ -0,0 +1,53 @@
+import sys
+
+from src.player import *
+
+from src import io, user_mod
+
+phases: defaultdict[str, float] = defaultdict(float)
+
+
+class BenchGame(Game):
+    async def day(self) -> None:
+        phase = f'day {self.time.hour}'
+        start = time.perf_counter()
+        try:
+            await super().day()
+        finally:
+            phases[phase] += time.perf_counter() - start
+
+    async def night(self) -> None:
+        phase = f'night {self.time.hour}'
+        start = time.perf_counter()
+        try:
+            await super().night()
+        finally:
+            phases[phase] += time.perf_counter() - start
+
+
+io.backend = 'mock'
+io.cache = None
+chars = [
+    Char(char.name, 'ai', char.model, char.description)
+    for char in user_mod.chars
+]
+roles: list[type[PPlayer]] = user_mod.roles
+games = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+infos = 0
+start = time.perf_counter()
+with open(os.devnull, 'w', encoding='utf-8') as devnull:
+    for _ in range(games):
+        game = BenchGame(chars, roles)
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            asyncio.run(game.loop())
+        finally:
+            sys.stdout = stdout
+        infos += len(game.info)
+elapsed = time.perf_counter() - start
+
+print(f'{games} games in {elapsed:.3f}s')
+print(f'{games / elapsed:.2f} games/sec, {infos / elapsed:.0f} infos/sec')
+for phase, seconds in sorted(phases.items(), key=lambda item: -item[1]):
+    print(f'\t{phase}: {seconds:.3f}s ({seconds / elapsed:.1%})')
@@ -7,4 +7,4 @@ roles: list[type[PPlayer]] = user_mod.roles
 
 game = Game(chars, roles)
 
-game.loop()
+asyncio.run(game.loop())
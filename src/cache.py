@@ -0,0 +1,75 @@
+from .header import *
+
+
+class Cache:
+    def __init__(self, path: str, size: int) -> None:
+        self.size = size
+        self.batch = max(size // 10, 1)
+        self.hits = 0
+        self.misses = 0
+        pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=30.0)
+        self.db.execute('PRAGMA journal_mode = WAL')
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS cache '
+            '(key TEXT PRIMARY KEY, content TEXT NOT NULL, used INTEGER NOT NULL)'
+        )
+        self.db.execute(
+            'CREATE INDEX IF NOT EXISTS cache_used ON cache (used)'
+        )
+        (self.clock,) = self.db.execute(
+            'SELECT COALESCE(MAX(used), 0) FROM cache'
+        ).fetchone()
+        (self.count,) = self.db.execute(
+            'SELECT COUNT(*) FROM cache'
+        ).fetchone()
+
+    def __str__(self) -> str:
+        return f'cache: {self.hits} hits, {self.misses} misses'
+
+    @staticmethod
+    def key(model: str, messages: Iterable[Any]) -> str:
+        text = json.dumps(
+            [model, list(messages)], ensure_ascii=False, default=dict
+        )
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        row = self.db.execute(
+            'SELECT content FROM cache WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.clock += 1
+        with self.db:
+            self.db.execute(
+                'UPDATE cache SET used = ? WHERE key = ?', (self.clock, key)
+            )
+        return row[0]
+
+    def put(self, key: str, content: str) -> None:
+        self.clock += 1
+        with self.db:
+            self.db.execute(
+                'INSERT OR REPLACE INTO cache VALUES (?, ?, ?)',
+                (key, content, self.clock),
+            )
+            self.count += 1
+            if self.count > self.size:
+                self.evict()
+
+    def evict(self) -> None:
+        (self.count,) = self.db.execute(
+            'SELECT COUNT(*) FROM cache'
+        ).fetchone()
+        if self.count <= self.size:
+            return
+        keep = max(self.size - self.batch, 0)
+        self.db.execute(
+            'DELETE FROM cache WHERE key IN '
+            '(SELECT key FROM cache ORDER BY used LIMIT ?)',
+            (self.count - keep,),
+        )
+        self.count = keep
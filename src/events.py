@@ -0,0 +1,48 @@
+from .header import *
+
+
+def seats(seat_set: SeatSet) -> list[int]:
+    return [seat + 1 for seat in seat_set.seats()]
+
+
+def encode(
+    kind: str,
+    time: Time,
+    source: SeatSet,
+    target: SeatSet,
+    content: str,
+    **extra: Any,
+) -> str:
+    record = {
+        'kind': kind,
+        'step': time.step,
+        'day': time.day,
+        'hour': time.hour,
+        'state': str(time.state),
+        'source': seats(source),
+        'target': seats(target),
+        'content': content,
+        **extra,
+    }
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+def read(
+    path: str | pathlib.Path, kinds: Iterable[str] = ()
+) -> Generator[dict[str, Any]]:
+    prefixes = tuple(
+        f'{{"kind":{json.dumps(kind)},'.encode() for kind in kinds
+    )
+    with open(path, 'rb', buffering=1 << 20) as file:
+        for line in file:
+            if prefixes and not line.startswith(prefixes):
+                continue
+            yield json.loads(line)
+
+
+def read_all(
+    paths: Iterable[str | pathlib.Path], kinds: Iterable[str] = ()
+) -> Generator[dict[str, Any]]:
+    kinds = tuple(kinds)
+    for path in paths:
+        yield from read(path, kinds)
@@ -1,19 +1,40 @@
+from array import array
 import asyncio
-from collections import Counter, UserList, UserString
-from collections.abc import Callable, Generator, Iterable
+import atexit
+from collections import Counter, UserList, UserString, defaultdict
+import contextlib
+from collections.abc import AsyncGenerator, Awaitable, Callable, Generator
+from collections.abc import Iterable, Iterator, Mapping, Sequence
 from copy import copy, deepcopy
-from dataclasses import dataclass
+import ctypes
+import ctypes.util
+from dataclasses import asdict, dataclass
 import datetime
 from enum import Enum, auto
 import functools
+import hashlib
+import heapq
+import importlib.util
 import itertools
+import json
+import mmap
+import os
 import pathlib
+import queue
 import random
 import re
+import select
+import sqlite3
 import string
+import struct
+import sys
+import tempfile
+import threading
 import time
-from typing import Any, Literal, NamedTuple, Protocol, Self, TypeAlias
-from typing import final, runtime_checkable
+import types
+import weakref
+from typing import Any, BinaryIO, Literal, NamedTuple, Protocol, Self, TextIO
+from typing import TypeAlias, cast, final, overload, runtime_checkable
 
 
 class NamedEnum(Enum):
@@ -107,6 +128,69 @@ class LStr(UserList[str]):
         return '/'.join(str(elem) for elem in self)
 
 
+class SeatSet:
+    __slots__ = ('players', 'mask')
+
+    def __init__(self, pls: Iterable['PPlayer'] = ()) -> None:
+        self.players: Sequence[PPlayer] = ()
+        self.mask = 0
+        for pl in pls:
+            self.players = pl.game.players
+            self.mask |= 1 << pl.seat
+
+    @classmethod
+    def from_mask(cls, players: Sequence['PPlayer'], mask: int) -> Self:
+        seats = cls()
+        seats.players = players
+        seats.mask = mask
+        return seats
+
+    def __str__(self) -> str:
+        return str(LSeat(self.seats()))
+
+    def __repr__(self) -> str:
+        return f'SeatSet({LSeat(self.seats())})'
+
+    def __len__(self) -> int:
+        return self.mask.bit_count()
+
+    def __bool__(self) -> bool:
+        return bool(self.mask)
+
+    def __contains__(self, pl: object) -> bool:
+        seat = getattr(pl, 'seat', pl)
+        return isinstance(seat, int) and bool(self.mask >> seat & 1)
+
+    def __iter__(self) -> Iterator['PPlayer']:
+        return (self.players[seat] for seat in self.seats())
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, SeatSet):
+            return self.mask == other.mask
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self.mask)
+
+    def __or__(self, other: Self) -> Self:
+        return self.from_mask(
+            self.players or other.players, self.mask | other.mask
+        )
+
+    def __and__(self, other: Self) -> Self:
+        return self.from_mask(self.players, self.mask & other.mask)
+
+    def __sub__(self, other: Self) -> Self:
+        return self.from_mask(self.players, self.mask & ~other.mask)
+
+    def seats(self) -> Generator[Seat]:
+        mask = self.mask
+        while mask:
+            low = mask & -mask
+            yield Seat(low.bit_length() - 1)
+            mask ^= low
+
+
 class State(NamedEnum):
     BEGIN = auto()
     DAY = auto()
@@ -117,29 +201,43 @@ class State(NamedEnum):
     LAST = NIGHT
 
 
-class Time:
-    def __init__(self) -> None:
-        self.start = datetime.datetime.now()
-        self.datetime = datetime.datetime.now()
-        self.state = State.BEGIN
-        self.step = 0
+class Time(NamedTuple):
+    start: datetime.datetime = datetime.datetime.min
+    day: int = 0
+    hour: int = 0
+    step: int = 0
+    state: State = State.BEGIN
+
+    @classmethod
+    def begin(cls) -> Self:
+        start = datetime.datetime.now()
+        return cls(start, 0, start.hour)
 
     def __str__(self) -> str:
-        return self.datetime.strftime('%d-%H:%M:%S')
+        return self.to_datetime().strftime('%d-%H:%M:%S')
+
+    def to_datetime(self) -> datetime.datetime:
+        return datetime.datetime.combine(
+            self.start.date(), datetime.time(self.hour)
+        ) + datetime.timedelta(days=self.day)
 
-    def time_inc(self) -> None:
-        self.time_add(datetime.timedelta(hours=1))
+    def time_inc(self) -> Self:
+        return self.time_add(1)
 
-    def time_add(self, delta: datetime.timedelta) -> None:
-        self.datetime += delta
-        self.refresh()
+    def time_add(self, hours: int) -> Self:
+        day, hour = divmod(self.hour + hours, 24)
+        return self.refresh(self.day + day, hour)
 
-    def time_set(self, time: datetime.time) -> None:
-        self.datetime = datetime.datetime.combine(self.datetime, time)
-        self.refresh()
+    def time_set(self, hour: int) -> Self:
+        return self.refresh(self.day, hour)
+
+    def time_skip(self, hours: Iterable[int]) -> Self:
+        return self.time_add(
+            min((hour - self.hour - 1) % 24 + 1 for hour in hours)
+        )
 
     def eq_date(self, other: Self) -> bool:
-        return self.datetime.date() == other.datetime.date()
+        return self.day == other.day
 
     def eq_state(self, other: Self) -> bool:
         return self.eq_date(other) and self.state == other.state
@@ -152,12 +250,14 @@ class Time:
             return self.eq_step(other)
         return NotImplemented
 
-    def refresh(self) -> None:
-        self.step += 1
-        if 6 <= self.datetime.hour < 18:
-            self.state = State.DAY
-        else:
-            self.state = State.NIGHT
+    def __hash__(self) -> int:
+        return hash(self.step)
+
+    def refresh(self, day: int, hour: int) -> Self:
+        state = State.DAY if 6 <= hour < 18 else State.NIGHT
+        return self._replace(
+            day=day, hour=hour, step=self.step + 1, state=state
+        )
 
 
 class Input(NamedTuple):
@@ -178,60 +278,261 @@ class Output(NamedTuple):
 class Info(NamedTuple):
     game: 'PGame'
     time: Time = Time()
-    source: tuple['PPlayer', ...] = ()
-    target: tuple['PPlayer', ...] = ()
+    source: SeatSet = SeatSet()
+    target: SeatSet = SeatSet()
     content: str = ''
 
     def __str__(self) -> str:
         return f'[{self.time}]{pls2str(self.source)}> {self.content}'
 
 
+class InfoStore:
+    intern_size = 64
+    render_size = 64
+
+    def __init__(
+        self,
+        game: 'PGame',
+        render: Callable[[Info], Mapping[str, str]],
+        spill: int = 0,
+    ) -> None:
+        self.game = game
+        self.render = render
+        self.spill = spill
+        self.width = 0
+        self.steps = array('I')
+        self.stamps = array('I')
+        self.states = array('b')
+        self.sources = bytearray()
+        self.targets = bytearray()
+        self.offsets = array('Q')
+        self.lengths = array('I')
+        self.text = bytearray()
+        self.interned: dict[str, int] = {}
+        self.rendered: dict[int, Mapping[str, str]] = {}
+        self.spilled = 0
+        self.file: BinaryIO | None = None
+        self.map: mmap.mmap | None = None
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    def __iter__(self) -> Iterator[Info]:
+        return (self[index] for index in range(len(self)))
+
+    def __getitem__(self, index: int) -> Info:
+        index = range(len(self))[index]
+        day, hour = divmod(self.stamps[index], 24)
+        time = Time(
+            self.game.time.start,
+            day,
+            hour,
+            self.steps[index],
+            State(self.states[index]),
+        )
+        start, stop = index * self.width, (index + 1) * self.width
+        players = self.game.players
+        source = int.from_bytes(self.sources[start:stop], 'little')
+        target = int.from_bytes(self.targets[start:stop], 'little')
+        return Info(
+            self.game,
+            time,
+            SeatSet.from_mask(players, source),
+            SeatSet.from_mask(players, target),
+            self.content(index),
+        )
+
+    def content(self, index: int) -> str:
+        offset, length = self.offsets[index], self.lengths[index]
+        if offset >= self.spilled:
+            offset -= self.spilled
+            return self.text[offset : offset + length].decode()
+        if self.map is None:
+            raise RuntimeError('spilled text is not mapped')
+        return self.map[offset : offset + length].decode()
+
+    def message(self, index: int) -> Mapping[str, str]:
+        if message := self.rendered.get(index):
+            return message
+        message = self.render(self[index])
+        recent = index >= len(self) - self.render_size
+        if recent and self.offsets[index] >= self.spilled:
+            self.rendered[index] = message
+        return message
+
+    def dump(self) -> None:
+        if self.file is None:
+            self.file = tempfile.TemporaryFile()
+        self.file.write(self.text)
+        self.file.flush()
+        self.spilled += len(self.text)
+        self.text = bytearray()
+        self.rendered.clear()
+        if self.map is not None:
+            self.map.close()
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def append(self, info: Info) -> None:
+        if not self.width:
+            self.width = max(1, (len(self.game.players) + 7) // 8)
+        self.rendered.pop(len(self) - self.render_size, None)
+        time = info.time
+        self.steps.append(time.step)
+        self.stamps.append(time.day * 24 + time.hour)
+        self.states.append(time.state.value)
+        self.sources += info.source.mask.to_bytes(self.width, 'little')
+        self.targets += info.target.mask.to_bytes(self.width, 'little')
+        index = len(self.offsets)
+        if len(info.content) <= self.intern_size:
+            index = self.interned.setdefault(info.content, index)
+        if index < len(self.offsets):
+            self.offsets.append(self.offsets[index])
+            self.lengths.append(self.lengths[index])
+            return
+        data = info.content.encode()
+        self.offsets.append(self.spilled + len(self.text))
+        self.lengths.append(len(data))
+        self.text += data
+        if self.spill and len(self.text) > self.spill:
+            self.dump()
+
+
+class Transcript:
+    def __init__(self, store: InfoStore, history: list[int]) -> None:
+        self.store = store
+        self.history = history
+
+    def __len__(self) -> int:
+        return len(self.history)
+
+    def __iter__(self) -> Iterator[Mapping[str, str]]:
+        return (self.store.message(index) for index in self.history)
+
+    @overload
+    def __getitem__(self, index: int) -> Mapping[str, str]:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[Mapping[str, str]]:
+        ...
+
+    def __getitem__(
+        self, index: int | slice
+    ) -> Mapping[str, str] | list[Mapping[str, str]]:
+        if isinstance(index, slice):
+            return [self.store.message(i) for i in self.history[index]]
+        return self.store.message(self.history[index])
+
+
+@dataclass
+class Call:
+    step: int
+    seat: str
+    role: str
+    phase: str
+    task: str
+    model: str
+    latency: float = 0.0
+    queued: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    retries: int = 0
+    parse_failure: bool = False
+
+
 class Mark(NamedTuple):
     name: str
     info: Info
     priority: int = 0
 
-    def exec(self) -> None:
-        for t in self.info.target:
-            if skill := t.skills.get(self.name):
-                skill(self)
-                continue
-            for s in self.info.source:
-                if skill := s.skills.get(self.name):
-                    skill(self)
-                    break
-            else:
-                raise RuntimeError('no skill')
+    async def exec(self) -> None:
+        game = self.info.game
+        game.emit(
+            'mark',
+            game.time,
+            self.info.source,
+            self.info.target,
+            self.name,
+            priority=self.priority,
+        )
+        with tracer.span(
+            f'mark {self.name}',
+            source=pls2str(self.info.source),
+            target=pls2str(self.info.target),
+        ):
+            for t in self.info.target:
+                if skill := t.skills.get(self.name):
+                    await skill(self)
+                    continue
+                for s in self.info.source:
+                    if skill := s.skills.get(self.name):
+                        await skill(self)
+                        break
+                else:
+                    raise RuntimeError('no skill')
+
 
+Skill: TypeAlias = Callable[[Mark], Awaitable[None]]
 
-Skill: TypeAlias = Callable[[Mark], None]
 
+class Marks:
+    clock = itertools.count()
 
-class Marks(UserList[Mark]):
     def __init__(self, pl: 'PPlayer') -> None:
         self.pl = pl
-        super().__init__()
-
-    def reset(self, marks: Iterable[Mark]) -> None:
-        self.data = list(marks)
+        self.heap: list[tuple[int, int]] = []
+        self.live: dict[int, Mark] = {}
+        self.names: dict[str, set[int]] = {}
+
+    def __iter__(self) -> Iterator[Mark]:
+        return iter(list(self.live.values()))
+
+    def __len__(self) -> int:
+        return len(self.live)
+
+    def __contains__(self, name: object) -> bool:
+        return bool(self.names.get(str(name)))
+
+    def push(self, mark: Mark) -> None:
+        seq = next(self.clock)
+        heapq.heappush(self.heap, (-mark.priority, -seq))
+        self.live[seq] = mark
+        self.names.setdefault(mark.name, set()).add(seq)
+        self.pl.game.pending[mark.name][seq] = mark
+
+    def pop(self) -> Mark:
+        while True:
+            _, key = heapq.heappop(self.heap)
+            if mark := self.live.pop(-key, None):
+                break
+        self.names[mark.name].discard(-key)
+        del self.pl.game.pending[mark.name][-key]
+        return mark
+
+    def remove(self, name: str) -> None:
+        pending = self.pl.game.pending[name]
+        for seq in self.names.pop(name, ()):
+            del self.live[seq]
+            del pending[seq]
+        if not self.live:
+            self.heap.clear()
 
     def add(
         self, name: str, source: Iterable['PPlayer'], priority: int = 0
     ) -> None:
         game = self.pl.game
-        info = Info(game, copy(game.time), tuple(source), (self.pl,))
-        return super().append(Mark(name, info, priority))
+        info = Info(game, game.time, SeatSet(source), SeatSet((self.pl,)))
+        self.push(Mark(name, info, priority))
 
-    def add_exec(self, name: str, source: Iterable['PPlayer']) -> None:
+    async def add_exec(self, name: str, source: Iterable['PPlayer']) -> None:
         game = self.pl.game
-        info = Info(game, copy(game.time), tuple(source), (self.pl,))
-        Mark(name, info).exec()
+        info = Info(game, game.time, SeatSet(source), SeatSet((self.pl,)))
+        await Mark(name, info).exec()
 
-    def exec(self) -> None:
-        while self:
-            self.sort(key=lambda mark: mark.priority)
-            mark = self.pop()
-            mark.exec()
+    async def exec(self) -> None:
+        while self.live:
+            await self.pop().exec()
 
 
 @runtime_checkable
@@ -243,12 +544,19 @@ class PPlayer(Protocol):
     role: Role
     skills: dict[str, Skill]
     marks: Marks
-    death: Marks
+    death: list[Mark]
     tasks: list[Input]
     results: list[Output]
+    history: list[int]
+    messages: Transcript
+    summary: str
+    summarized: int
+    anchor: tuple[int, str]
 
     vote: float
     can_expose: bool = False
+    needs: tuple[str, ...] = ()
+    gives: tuple[str, ...] = ()
 
     def __init__(self, game: 'PGame', char: Char, seat: Seat) -> None:
         ...
@@ -269,13 +577,13 @@ class PPlayer(Protocol):
     def receive(self, content: str) -> None:
         ...
 
-    def loop(self) -> None:
+    async def loop(self) -> None:
         ...
 
-    def day(self) -> None:
+    async def day(self) -> None:
         ...
 
-    def night(self) -> None:
+    async def night(self) -> None:
         ...
 
     def dying(self) -> None:
@@ -284,13 +592,13 @@ class PPlayer(Protocol):
     def verdict(self) -> None:
         ...
 
-    def exec(self) -> None:
+    async def exec(self) -> None:
         ...
 
     def killed(self, mark: Mark) -> None:
         ...
 
-    def expose(self) -> None:
+    async def expose(self) -> None:
         ...
 
 
@@ -301,13 +609,13 @@ class PBadge(Protocol):
     def __init__(self, game: 'PGame') -> None:
         ...
 
-    def election(self) -> None:
+    async def election(self) -> None:
         ...
 
-    def transfer(self) -> None:
+    async def transfer(self) -> None:
         ...
 
-    def speakers(self) -> list[PPlayer]:
+    async def speakers(self) -> list[PPlayer]:
         ...
 
 
@@ -316,12 +624,20 @@ class PGame(Protocol):
     roles: list[type[PPlayer]]
     time: Time
     players: list[PPlayer]
-    info: list[Info]
+    info: InfoStore
     badge: PBadge
+    election_round: int
+    usage: Counter[str]
+    metrics: list[Call]
+    hours: set[int]
+    daytime: SeatSet
+    factions: Counter[str]
+    categories: Counter[tuple[str, str]]
+    pending: defaultdict[str, dict[int, Mark]]
 
     winner: Role
-    options: list[PPlayer]
-    died: list[PPlayer]
+    options: SeatSet
+    died: SeatSet
 
     def __init__(self) -> None:
         ...
@@ -335,25 +651,39 @@ class PGame(Protocol):
     def unicast(self, pl: PPlayer, content: str) -> None:
         ...
 
-    def loop(self) -> None:
+    def emit(
+        self,
+        kind: str,
+        time: Time,
+        source: SeatSet,
+        target: SeatSet,
+        content: str,
+        **extra: Any,
+    ) -> None:
+        ...
+
+    async def loop(self) -> None:
         ...
 
-    def day(self) -> None:
+    async def day(self) -> None:
         ...
 
-    def night(self) -> None:
+    async def night(self) -> None:
         ...
 
-    def verdict(self) -> None:
+    async def schedule(self) -> None:
         ...
 
-    def exec(self) -> None:
+    async def verdict(self) -> None:
         ...
 
-    def testament(self) -> None:
+    async def exec(self) -> None:
         ...
 
-    def vote(
+    async def testament(self) -> None:
+        ...
+
+    async def vote(
         self,
         candidates: Iterable[PPlayer],
         voters: Iterable[PPlayer],
@@ -425,4 +755,11 @@ class TimeChangedError(BaseGameError):
     ...
 
 
+class FormatError(ValueError):
+    def __init__(self, message: str, content: str = '') -> None:
+        super().__init__(message)
+        self.content = content
+
+
 from . import user_data
+from .trace import tracer
@@ -1,14 +1,131 @@
-from openai import OpenAI, AsyncOpenAI
+import httpx
+from openai import OpenAI, AsyncOpenAI, APIError
+from openai.types import CompletionUsage
 from openai.types.chat.chat_completion_message_param import (
     ChatCompletionMessageParam,
 )
 
 from .header import *
+from .cache import Cache
+from .limit import Limiter
+from .events import encode
+from .metrics import to_json, to_prometheus
+from .trace import tracer
+from .mock import input_mock, async_input_mock
+
+
+endpoints: dict[str, tuple[str, str]] = getattr(user_data, 'endpoints', {})
+limits = httpx.Limits(
+    max_connections=getattr(user_data, 'max_connections', 32),
+    max_keepalive_connections=getattr(user_data, 'max_connections', 32),
+    keepalive_expiry=getattr(user_data, 'keepalive', 60.0),
+)
+timeout = httpx.Timeout(getattr(user_data, 'timeout', 120.0))
+http2: bool = (
+    getattr(user_data, 'http2', True)
+    and importlib.util.find_spec('h2') is not None
+)
+
+stream: bool = getattr(user_data, 'stream', False)
+spill: int = getattr(user_data, 'spill', 0)
+event_log: bool = getattr(user_data, 'event_log', False)
+
+rate_limit: tuple[float, float] = getattr(user_data, 'rate_limit', (0, 0))
+rate_limits: dict[str, tuple[float, float]] = getattr(
+    user_data, 'rate_limits', {}
+)
+rate_burst: float = getattr(user_data, 'rate_burst', 60.0)
+limiters: dict[tuple[str, str], Limiter] = {}
+
+clients: dict[tuple[str, str], OpenAI] = {}
+async_clients: dict[
+    tuple[str, str], tuple[asyncio.AbstractEventLoop, AsyncOpenAI]
+] = {}
+
+
+def endpoint(model: str) -> tuple[str, str]:
+    return endpoints.get(model, (user_data.base_url, user_data.api_key))
+
+
+def get_limiter(model: str) -> Limiter:
+    base_url, _ = endpoint(model)
+    if limiter := limiters.get((base_url, model)):
+        return limiter
+    requests, tokens = rate_limits.get(model, rate_limit)
+    limiter = limiters[base_url, model] = Limiter(requests, tokens, rate_burst)
+    return limiter
+
+
+def estimate(messages: Iterable[Mapping[str, Any]]) -> int:
+    return (
+        sum(len(str(message.get('content', ''))) for message in messages) // 4
+    )
+
+
+def get_client(model: str) -> OpenAI:
+    base_url, api_key = endpoint(model)
+    if client := clients.get((base_url, model)):
+        return client
+    client = clients[base_url, model] = OpenAI(
+        api_key=api_key,
+        base_url=base_url,
+        http_client=httpx.Client(limits=limits, timeout=timeout, http2=http2),
+    )
+    return client
+
+
+def get_async_client(model: str) -> AsyncOpenAI:
+    base_url, api_key = endpoint(model)
+    loop = asyncio.get_running_loop()
+    if entry := async_clients.get((base_url, model)):
+        if entry[0] is loop:
+            return entry[1]
+    client = AsyncOpenAI(
+        api_key=api_key,
+        base_url=base_url,
+        http_client=httpx.AsyncClient(
+            limits=limits, timeout=timeout, http2=http2
+        ),
+    )
+    async_clients[base_url, model] = (loop, client)
+    return client
+
 
+async def warm(models: Iterable[str]) -> None:
+    if backend == 'mock':
+        return
 
-client = OpenAI(
-    api_key=user_data.api_key,
-    base_url=user_data.base_url,
+    async def connect(model: str) -> None:
+        try:
+            await get_async_client(model).models.list()
+        except APIError:
+            pass
+
+    await asyncio.gather(*(connect(model) for model in models))
+
+
+async def close_clients() -> None:
+    loop = asyncio.get_running_loop()
+    for key, (owner, client) in list(async_clients.items()):
+        if owner is loop:
+            del async_clients[key]
+            await client.close()
+
+
+backend: Literal['openai', 'mock'] = getattr(user_data, 'backend', 'openai')
+
+max_attempts: int = getattr(user_data, 'max_attempts', 5)
+retry_delay: float = getattr(user_data, 'retry_delay', 1.0)
+memory: int = getattr(user_data, 'memory', 0)
+prompt_layout: Literal['default', 'stable'] = getattr(
+    user_data, 'prompt_layout', 'default'
+)
+
+cache_path: str = getattr(user_data, 'cache', '')
+cache: Cache | None = (
+    Cache(cache_path, getattr(user_data, 'cache_size', 100000))
+    if cache_path
+    else None
 )
 
 system_prompt = (
@@ -44,12 +161,97 @@ log_time = Time()
 log_name = time.strftime('%y-%m-%d-%H-%M-%S')
 
 
+class Sink:
+    interval = 0.1
+
+    def __init__(self) -> None:
+        self.queue: queue.Queue[tuple[str, pathlib.Path, str]] = queue.Queue()
+        self.files: dict[pathlib.Path, TextIO] = {}
+        self.error: Exception | None = None
+        self.thread = threading.Thread(target=self.drain, daemon=True)
+        self.thread.start()
+
+    def write(
+        self, path: pathlib.Path, content: str, clear: bool = False
+    ) -> None:
+        self.queue.put(('clear' if clear else 'write', path, content))
+
+    def flush(self) -> None:
+        self.queue.put(('flush', pathlib.Path(), ''))
+        self.join()
+        if error := self.error:
+            self.error = None
+            raise error
+
+    def close(self) -> None:
+        self.queue.put(('close', pathlib.Path(), ''))
+        self.join()
+
+    def join(self) -> None:
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks:
+                if not self.thread.is_alive():
+                    raise RuntimeError('sink thread is dead')
+                self.queue.all_tasks_done.wait(self.interval)
+
+    def open(self, path: pathlib.Path) -> TextIO:
+        if file := self.files.get(path):
+            return file
+        path.parent.mkdir(parents=True, exist_ok=True)
+        file = self.files[path] = path.open(mode='a', encoding='utf-8')
+        return file
+
+    def drain(self) -> None:
+        while True:
+            action, path, content = self.queue.get()
+            try:
+                match action:
+                    case 'write':
+                        self.open(path).write(content)
+                    case 'clear':
+                        if file := self.files.pop(path, None):
+                            file.close()
+                        file = self.open(path)
+                        file.truncate(0)
+                        file.write(content)
+                    case 'flush':
+                        for file in self.files.values():
+                            file.flush()
+                    case 'close':
+                        for file in self.files.values():
+                            file.close()
+                        self.files.clear()
+            except Exception as e:
+                self.error = e
+                print(f'sink: {action} {path}: {e!r}', file=sys.stderr)
+            finally:
+                self.queue.task_done()
+
+
+sink = Sink()
+atexit.register(sink.close)
+
+
 def log(content: str, clear_text: str = '') -> None:
     log_path = pathlib.Path(f'io/{log_name}.log')
     if clear_text:
-        log_path.write_text(clear_text, encoding='utf-8')
-    with log_path.open(mode='a', encoding='utf-8') as file:
-        file.write(content)
+        sink.write(log_path, clear_text, clear=True)
+    sink.write(log_path, content)
+
+
+def emit(
+    kind: str,
+    time: Time,
+    source: SeatSet,
+    target: SeatSet,
+    content: str,
+    **extra: Any,
+) -> None:
+    if event_log:
+        sink.write(
+            pathlib.Path(f'io/{log_name}-events.jsonl'),
+            encode(kind, time, source, target, content, **extra),
+        )
 
 
 def output_info(
@@ -58,6 +260,7 @@ def output_info(
     clear_text: str = '',
 ) -> None:
     global log_time
+    emit('info', info.time, info.source, info.target, info.content)
     if info.time.eq_step(log_time):
         text = f'\t{pls2str(info.source)}> {info.content}'
     else:
@@ -70,11 +273,9 @@ def output_info(
         if pl.char.control != 'file':
             continue
         file_path = pathlib.Path(f'io/{pl.seat}.txt')
-        file_path.parent.mkdir(parents=True, exist_ok=True)
         if clear_text:
-            file_path.write_text(clear_text, encoding='utf-8')
-        with file_path.open(mode='a', encoding='utf-8') as file:
-            file.write(f'{text}\n')
+            sink.write(file_path, clear_text, clear=True)
+        sink.write(file_path, f'{text}\n')
 
 
 def get_console_inputs(pl: PPlayer) -> None:
@@ -88,85 +289,440 @@ def get_console_inputs(pl: PPlayer) -> None:
             pl.results.append(Output(o))
 
 
-def parse(pl: PPlayer, content: str) -> None:
-    content = content.replace('\n', ' ')
+def parse(pl: PPlayer, raw: str) -> None:
+    content = raw.replace('\n', ' ')
     if '---' not in content:
-        raise ValueError(f'wrong format: 0 "---"')
+        raise FormatError(f'wrong format: 0 "---"', raw)
     lcontent = content.split('---')
     if len(lcontent) != len(pl.tasks):
-        raise ValueError(f'wrong format: {len(lcontent) - 1} "---"')
-    pl.results = [
-        Output(content.strip(' \'"[]').lower()) for content in lcontent
-    ]
-    for e, (i, o) in enumerate(zip(pl.tasks, pl.results)):
-        if i.options and o.output not in i.options:
-            nums = re.findall(r'[0-9]+', o.output)
-            if len(nums) == 1 and nums[0] in i.options:
-                pl.results[e] = Output(nums[0])
-            else:
-                raise ValueError(f'wrong value: {o.output}')
+        raise FormatError(f'wrong format: {len(lcontent) - 1} "---"', raw)
+    pl.results = [check(i, field, raw) for i, field in zip(pl.tasks, lcontent)]
+
+
+def check(task: Input, field: str, raw: str) -> Output:
+    output = field.strip(' \'"[]').lower()
+    if not task.options or output in task.options:
+        return Output(output)
+    nums = re.findall(r'[0-9]+', output)
+    if len(nums) == 1 and nums[0] in task.options:
+        return Output(nums[0])
+    raise FormatError(f'wrong value: {output}', raw)
+
+
+class Scanner:
+    def __init__(self, pl: PPlayer) -> None:
+        self.tasks = pl.tasks
+        self.text = ''
+        self.closed = 0
+
+    def feed(self, delta: str) -> None:
+        self.text += delta
+        if '---' not in self.text[-len(delta) - 2 :]:
+            return
+        fields = self.text.replace('\n', ' ').split('---')
+        if len(fields) > len(self.tasks):
+            raise FormatError(
+                f'wrong format: {len(fields) - 1} "---"', self.text
+            )
+        for task, field in zip(
+            self.tasks[self.closed :], fields[self.closed : -1]
+        ):
+            check(task, field, self.text)
+        self.closed = len(fields) - 1
 
 
-def input_ai(pl: PPlayer, messages: list[ChatCompletionMessageParam]) -> str:
-    chat_completion = client.chat.completions.create(
+def fallback(task: Input) -> Output:
+    if not task.options:
+        return Output('')
+    for option in ('pass', 'no'):
+        if option in task.options:
+            return Output(option)
+    return Output(random.choice(task.options))
+
+
+def backoff(attempt: int) -> float:
+    return random.uniform(0, retry_delay * 2**attempt)
+
+
+budget: Any = None
+
+
+@contextlib.contextmanager
+def budgeted() -> Generator[None]:
+    if budget is None:
+        yield
+        return
+    budget.acquire()
+    try:
+        yield
+    finally:
+        budget.release()
+
+
+def release(acquiring: asyncio.Future[Any]) -> None:
+    if not acquiring.cancelled() and acquiring.exception() is None:
+        budget.release()
+
+
+@contextlib.asynccontextmanager
+async def async_budgeted() -> AsyncGenerator[None]:
+    if budget is None:
+        yield
+        return
+    acquiring = asyncio.ensure_future(asyncio.to_thread(budget.acquire))
+    try:
+        await asyncio.shield(acquiring)
+    except asyncio.CancelledError:
+        acquiring.add_done_callback(release)
+        raise
+    try:
+        yield
+    finally:
+        budget.release()
+
+
+def record_usage(
+    pl: PPlayer, usage: CompletionUsage | None, call: Call
+) -> None:
+    if usage is None:
+        return
+    call.prompt_tokens = usage.prompt_tokens
+    call.completion_tokens = usage.completion_tokens
+    if details := usage.prompt_tokens_details:
+        call.cached_tokens = details.cached_tokens or 0
+    pl.game.usage['prompt_tokens'] += call.prompt_tokens
+    pl.game.usage['completion_tokens'] += call.completion_tokens
+    pl.game.usage['cached_tokens'] += call.cached_tokens
+
+
+@contextlib.contextmanager
+def measured(pl: PPlayer, attempt: int) -> Generator[Call]:
+    game = pl.game
+    call = Call(
+        game.time.step,
+        str(pl.seat),
+        pl.role.kind,
+        f'{game.time.state} {game.time.hour}',
+        pl.tasks[3].prompt,
+        pl.char.model,
+        retries=attempt,
+    )
+    game.metrics.append(call)
+    try:
+        yield call
+    except FormatError:
+        call.parse_failure = True
+        raise
+    finally:
+        emit(
+            'call',
+            game.time,
+            SeatSet((pl,)),
+            SeatSet(),
+            call.task,
+            role=call.role,
+            model=call.model,
+            latency=call.latency,
+            prompt_tokens=call.prompt_tokens,
+            completion_tokens=call.completion_tokens,
+            cached_tokens=call.cached_tokens,
+            retries=call.retries,
+            parse_failure=call.parse_failure,
+        )
+
+
+def report(calls: list[Call]) -> None:
+    sink.write(
+        pathlib.Path(f'io/{log_name}-metrics.json'),
+        to_json(calls),
+        clear=True,
+    )
+    sink.write(
+        pathlib.Path(f'io/{log_name}.prom'), to_prometheus(calls), clear=True
+    )
+    if tracer.enabled:
+        sink.write(
+            pathlib.Path(f'io/{log_name}-trace.json'),
+            tracer.to_json(),
+            clear=True,
+        )
+        tracer.clear()
+
+
+def input_stream(
+    pl: PPlayer, messages: list[ChatCompletionMessageParam]
+) -> tuple[str, CompletionUsage | None]:
+    scanner = Scanner(pl)
+    usage: CompletionUsage | None = None
+    with get_client(pl.char.model).chat.completions.create(
         model=pl.char.model,
         messages=messages,
-    )
-    content = chat_completion.choices[0].message.content
+        stream=True,
+        stream_options={'include_usage': True},
+    ) as chunks:
+        for chunk in chunks:
+            usage = chunk.usage or usage
+            if chunk.choices and (delta := chunk.choices[0].delta.content):
+                scanner.feed(delta)
+    return scanner.text, usage
+
+
+def input_ai(
+    pl: PPlayer, messages: list[ChatCompletionMessageParam], call: Call
+) -> str:
+    limiter = get_limiter(pl.char.model)
+    tokens = estimate(messages)
+    queued = time.perf_counter()
+    try:
+        limiter.acquire(tokens)
+        with budgeted():
+            with tracer.span(f'request {pl.char.model}', seat=str(pl.seat)):
+                start = time.perf_counter()
+                call.queued = start - queued
+                try:
+                    usage: CompletionUsage | None = None
+                    if backend == 'mock':
+                        content = input_mock(pl)
+                    elif stream:
+                        content, usage = input_stream(pl, messages)
+                    else:
+                        chat_completion = get_client(
+                            pl.char.model
+                        ).chat.completions.create(
+                            model=pl.char.model,
+                            messages=messages,
+                        )
+                        content = (
+                            chat_completion.choices[0].message.content or ''
+                        )
+                        usage = chat_completion.usage
+                finally:
+                    call.latency = time.perf_counter() - start
+    except (APIError, asyncio.CancelledError):
+        limiter.settle(tokens, 0)
+        raise
+    if usage:
+        limiter.settle(tokens, usage.total_tokens)
+    record_usage(pl, usage, call)
     if not content:
         raise ValueError('empty output')
     return content
 
 
-def get_ai_inputs(pl: PPlayer) -> None:
-    messages: list[ChatCompletionMessageParam] = [
-        {'role': 'system', 'content': system_prompt}
-    ]
-    for info in pl.game.info:
-        if pl not in info.target:
-            continue
-        message: ChatCompletionMessageParam = {
+def render(info: Info) -> Mapping[str, str]:
+    source = f'Seat {pls2str(info.source)}'
+    return types.MappingProxyType(
+        {
             'role': 'user',
-            'content': f'Seat {pls2str(info.source)}: {info.content}',
-            'name': f'Seat {pls2str(info.source)}',
+            'content': f'{source}: {info.content}',
+            'name': source,
         }
-        messages.append(message)
-    prompt = (
+    )
+
+
+def recall(pl: PPlayer) -> list[ChatCompletionMessageParam]:
+    messages = cast(Sequence[ChatCompletionMessageParam], pl.messages)
+    if not memory or not pl.summary or len(messages) <= memory:
+        return list(messages)
+    start = max(pl.summarized, len(messages) - memory)
+    summary = pl.summary
+    if prompt_layout == 'stable':
+        if not pl.anchor[1] or start - pl.anchor[0] >= memory:
+            pl.anchor = (start, summary)
+        start, summary = pl.anchor
+    return [
+        {
+            'role': 'assistant',
+            'content': f'My summary of the game so far: {summary}',
+        },
+        *messages[start:],
+    ]
+
+
+def task_prompt(pl: PPlayer) -> str:
+    return (
         f'You are seat {pl.seat}, a {pl.role.kind}.\n'
         f'Your personality: {pl.char.description}\n'
         f'Your task: Replace the content in the square brackets with your answer.\n'
         f'Output format: {" --- ".join(str(task) for task in pl.tasks)}'
     )
-    messages.append({'role': 'system', 'content': prompt})
-    content = input_ai(pl, messages)
-    parse(pl, content)
+
+
+def ai_messages(
+    pl: PPlayer, error: FormatError | None = None
+) -> list[ChatCompletionMessageParam]:
+    if error is not None:
+        return [
+            {'role': 'system', 'content': task_prompt(pl)},
+            {'role': 'assistant', 'content': error.content},
+            {
+                'role': 'user',
+                'content': f'Your answer was rejected ({error}). Answer again in the output format.',
+            },
+        ]
+    return [
+        {'role': 'system', 'content': system_prompt},
+        *recall(pl),
+        {'role': 'system', 'content': task_prompt(pl)},
+    ]
+
+
+def lookup(
+    pl: PPlayer, messages: list[ChatCompletionMessageParam]
+) -> tuple[str, str | None]:
+    if cache is None:
+        return '', None
+    key = Cache.key(pl.char.model, messages)
+    return key, cache.get(key)
+
+
+def store(key: str, content: str) -> None:
+    if cache is not None:
+        cache.put(key, content)
+
+
+def get_ai_inputs(
+    pl: PPlayer, error: FormatError | None = None, attempt: int = 0
+) -> None:
+    messages = ai_messages(pl, error)
+    key, content = lookup(pl, messages)
+    if content is None:
+        with measured(pl, attempt) as call:
+            content = input_ai(pl, messages, call)
+            parse(pl, content)
+    else:
+        parse(pl, content)
+    store(key, content)
+
+
+IN_MODIFY = 0x2
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_CLOEXEC = 0o2000000
+IN_NONBLOCK = 0o4000
+
+try:
+    libc: ctypes.CDLL | None = ctypes.CDLL(
+        ctypes.util.find_library('c'), use_errno=True
+    )
+    libc.inotify_init1  # type: ignore[union-attr]
+except (OSError, AttributeError):
+    libc = None
+
+
+class Watcher:
+    interval = 0.05
+
+    def __init__(self, path: pathlib.Path) -> None:
+        self.path = path
+        self.fd = -1
+        self.stamp = self.stat()
+        if libc is None:
+            return
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            return
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        if libc.inotify_add_watch(fd, bytes(path.parent), mask) < 0:
+            os.close(fd)
+            return
+        self.fd = fd
+
+    def stat(self) -> int:
+        try:
+            return self.path.stat().st_mtime_ns
+        except OSError:
+            return 0
+
+    def changed(self) -> bool:
+        if self.fd < 0:
+            stamp = self.stat()
+            changed = stamp != self.stamp
+            self.stamp = stamp
+            return changed
+        changed = False
+        while True:
+            try:
+                data = os.read(self.fd, 4096)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                _, _, _, length = struct.unpack_from('iIII', data, offset)
+                offset += 16
+                name = data[offset : offset + length].rstrip(b'\0')
+                offset += length
+                if name == self.path.name.encode():
+                    changed = True
+
+    def wait(self) -> None:
+        while not self.changed():
+            if self.fd < 0:
+                time.sleep(self.interval)
+            else:
+                select.select([self.fd], [], [])
+
+    async def async_wait(self) -> None:
+        while not self.changed():
+            if self.fd < 0:
+                await asyncio.sleep(self.interval)
+                continue
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+
+            def ready() -> None:
+                if not future.done():
+                    future.set_result(None)
+
+            loop.add_reader(self.fd, ready)
+            try:
+                await future
+            finally:
+                loop.remove_reader(self.fd)
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def read_lines(file_path: pathlib.Path) -> list[str]:
+    lines = file_path.read_text(encoding='utf-8').splitlines(keepends=True)
+    if not lines:
+        raise ValueError('empty file')
+    return lines
+
+
+def write_lines(file_path: pathlib.Path, lines: list[str]) -> None:
+    sink.write(file_path, ''.join(lines), clear=True)
+    sink.flush()
 
 
 def get_file_inputs(pl: PPlayer) -> None:
+    sink.flush()
     file_path = pathlib.Path(f'io/{pl.seat}.txt')
     prompt = ' --- '.join(str(task) for task in pl.tasks)
-    with file_path.open('r', encoding='utf-8') as file:
-        lines = file.readlines()
-    if not lines or len(lines) < 2:
+    lines = read_lines(file_path)
+    if len(lines) < 2:
         raise ValueError('empty file')
     lines[0] = f'{prompt}\n'
     lines[1] = f'Major task: {pl.tasks[3].prompt}\n'
-    with file_path.open('w', encoding='utf-8') as file:
-        file.writelines(lines)
-    while True:
-        time.sleep(1)
-        with file_path.open('r', encoding='utf-8') as file:
-            lines = file.readlines()
-        if not lines:
-            raise ValueError('empty file')
-        content = lines[0].strip()
-        if content == prompt:
-            continue
-        parse(pl, content)
-        lines[0] = f'Please wait...\n'
-        with file_path.open('w', encoding='utf-8') as file:
-            file.writelines(lines)
-        break
+    watcher = Watcher(file_path)
+    try:
+        write_lines(file_path, lines)
+        while True:
+            watcher.wait()
+            lines = read_lines(file_path)
+            content = lines[0].strip()
+            if content == prompt:
+                continue
+            parse(pl, content)
+            lines[0] = f'Please wait...\n'
+            write_lines(file_path, lines)
+            break
+    finally:
+        watcher.close()
 
 
 def get_inputs(pl: PPlayer) -> None:
@@ -178,44 +734,64 @@ def get_inputs(pl: PPlayer) -> None:
         Input('your immediate action and long term strategy'),
     ]
     pl.tasks.append(Input('unpublished annotations'))
-    while True:
-        try:
-            match pl.char.control:
-                case 'console':
-                    get_console_inputs(pl)
-                case 'ai':
-                    get_ai_inputs(pl)
-                case 'file':
-                    get_file_inputs(pl)
-                case _:
-                    raise NotImplementedError('unknown control')
-        except NotImplementedError as e:
-            raise
-        except Exception as e:
-            output_info(Info(pl.game, copy(pl.game.time), (pl,), (), repr(e)))
-        else:
-            output_str = ' --- '.join(
-                f'{i.prompt}: {o.output}' for i, o in zip(pl.tasks, pl.results)
-            )
-            output_info(
-                Info(
-                    pl.game,
-                    copy(pl.game.time),
-                    (pl,),
-                    (),
-                    f'[{pl.role.kind}] ~> {output_str}',
+    seen = len(pl.history)
+    error: FormatError | None = None
+    attempt = 0
+    with tracer.span(
+        'get_inputs',
+        seat=str(pl.seat),
+        role=pl.role.kind,
+        task=pl.tasks[3].prompt,
+    ):
+        while True:
+            try:
+                match pl.char.control:
+                    case 'console':
+                        get_console_inputs(pl)
+                    case 'ai':
+                        get_ai_inputs(pl, error, attempt)
+                    case 'file':
+                        get_file_inputs(pl)
+                    case _:
+                        raise NotImplementedError('unknown control')
+            except NotImplementedError as e:
+                raise
+            except Exception as e:
+                output_info(
+                    Info(
+                        pl.game,
+                        pl.game.time,
+                        SeatSet((pl,)),
+                        SeatSet(),
+                        repr(e),
+                    )
                 )
-            )
-            (info, summary, strategy, *results, remarks) = pl.results
-            pl.tasks.clear()
-            pl.results = results
-            break
-
-
-async_client = AsyncOpenAI(
-    api_key=user_data.api_key,
-    base_url=user_data.base_url,
-)
+                attempt += 1
+                if pl.char.control == 'ai' and attempt >= max_attempts:
+                    pl.results = [fallback(task) for task in pl.tasks]
+                    break
+                error = e if isinstance(e, FormatError) else None
+                if isinstance(e, APIError):
+                    time.sleep(backoff(attempt))
+            else:
+                break
+    output_str = ' --- '.join(
+        f'{i.prompt}: {o.output}' for i, o in zip(pl.tasks, pl.results)
+    )
+    output_info(
+        Info(
+            pl.game,
+            pl.game.time,
+            SeatSet((pl,)),
+            SeatSet(),
+            f'[{pl.role.kind}] ~> {output_str}',
+        )
+    )
+    (info, summary, strategy, *results, remarks) = pl.results
+    if summary.output:
+        pl.summary, pl.summarized = summary.output, seen
+    pl.tasks.clear()
+    pl.results = results
 
 
 async def async_get_console_inputs(pl: PPlayer) -> None:
@@ -229,68 +805,103 @@ async def async_get_console_inputs(pl: PPlayer) -> None:
             pl.results.append(Output(o))
 
 
-async def async_input_ai(
+async def async_input_stream(
     pl: PPlayer, messages: list[ChatCompletionMessageParam]
-) -> str:
-    chat_completion = await async_client.chat.completions.create(
+) -> tuple[str, CompletionUsage | None]:
+    scanner = Scanner(pl)
+    usage: CompletionUsage | None = None
+    async with await get_async_client(pl.char.model).chat.completions.create(
         model=pl.char.model,
         messages=messages,
-    )
-    content = chat_completion.choices[0].message.content
+        stream=True,
+        stream_options={'include_usage': True},
+    ) as chunks:
+        async for chunk in chunks:
+            usage = chunk.usage or usage
+            if chunk.choices and (delta := chunk.choices[0].delta.content):
+                scanner.feed(delta)
+    return scanner.text, usage
+
+
+async def async_input_ai(
+    pl: PPlayer, messages: list[ChatCompletionMessageParam], call: Call
+) -> str:
+    limiter = get_limiter(pl.char.model)
+    tokens = estimate(messages)
+    queued = time.perf_counter()
+    try:
+        await limiter.async_acquire(tokens)
+        async with async_budgeted():
+            with tracer.span(f'request {pl.char.model}', seat=str(pl.seat)):
+                start = time.perf_counter()
+                call.queued = start - queued
+                try:
+                    usage: CompletionUsage | None = None
+                    if backend == 'mock':
+                        content = await async_input_mock(pl)
+                    elif stream:
+                        content, usage = await async_input_stream(pl, messages)
+                    else:
+                        client = get_async_client(pl.char.model)
+                        chat_completion = await client.chat.completions.create(
+                            model=pl.char.model,
+                            messages=messages,
+                        )
+                        content = (
+                            chat_completion.choices[0].message.content or ''
+                        )
+                        usage = chat_completion.usage
+                finally:
+                    call.latency = time.perf_counter() - start
+    except (APIError, asyncio.CancelledError):
+        limiter.settle(tokens, 0)
+        raise
+    if usage:
+        limiter.settle(tokens, usage.total_tokens)
+    record_usage(pl, usage, call)
     if not content:
         raise ValueError('empty output')
     return content
 
 
-async def async_get_ai_inputs(pl: PPlayer) -> None:
-    messages: list[ChatCompletionMessageParam] = [
-        {'role': 'system', 'content': system_prompt}
-    ]
-    for info in pl.game.info:
-        if pl not in info.target:
-            continue
-        message: ChatCompletionMessageParam = {
-            'role': 'user',
-            'content': f'Seat {pls2str(info.source)}: {info.content}',
-            'name': f'Seat {pls2str(info.source)}',
-        }
-        messages.append(message)
-    prompt = (
-        f'You are seat {pl.seat}, a {pl.role.kind}.\n'
-        f'Your personality: {pl.char.description}\n'
-        f'Your task: Replace the content in the square brackets with your answer.\n'
-        f'Output format: {" --- ".join(str(task) for task in pl.tasks)}'
-    )
-    messages.append({'role': 'system', 'content': prompt})
-    content = await async_input_ai(pl, messages)
-    parse(pl, content)
+async def async_get_ai_inputs(
+    pl: PPlayer, error: FormatError | None = None, attempt: int = 0
+) -> None:
+    messages = ai_messages(pl, error)
+    key, content = lookup(pl, messages)
+    if content is None:
+        with measured(pl, attempt) as call:
+            content = await async_input_ai(pl, messages, call)
+            parse(pl, content)
+    else:
+        parse(pl, content)
+    store(key, content)
 
 
 async def async_get_file_inputs(pl: PPlayer) -> None:
+    await asyncio.to_thread(sink.flush)
     file_path = pathlib.Path(f'io/{pl.seat}.txt')
     prompt = ' --- '.join(str(task) for task in pl.tasks)
-    with file_path.open('r', encoding='utf-8') as file:
-        lines = file.readlines()
-    if not lines or len(lines) < 2:
+    lines = await asyncio.to_thread(read_lines, file_path)
+    if len(lines) < 2:
         raise ValueError('empty file')
     lines[0] = f'{prompt}\n'
     lines[1] = f'Major task: {pl.tasks[3].prompt}\n'
-    with file_path.open('w', encoding='utf-8') as file:
-        file.writelines(lines)
-    while True:
-        await asyncio.sleep(1)
-        with file_path.open('r', encoding='utf-8') as file:
-            lines = file.readlines()
-        if not lines:
-            raise ValueError('empty file')
-        content = lines[0].strip()
-        if content == prompt:
-            continue
-        parse(pl, content)
-        lines[0] = f'Please wait...\n'
-        with file_path.open('w', encoding='utf-8') as file:
-            file.writelines(lines)
-        break
+    watcher = Watcher(file_path)
+    try:
+        await asyncio.to_thread(write_lines, file_path, lines)
+        while True:
+            await watcher.async_wait()
+            lines = await asyncio.to_thread(read_lines, file_path)
+            content = lines[0].strip()
+            if content == prompt:
+                continue
+            parse(pl, content)
+            lines[0] = f'Please wait...\n'
+            await asyncio.to_thread(write_lines, file_path, lines)
+            break
+    finally:
+        watcher.close()
 
 
 async def async_get_inputs(pl: PPlayer) -> None:
@@ -302,35 +913,61 @@ async def async_get_inputs(pl: PPlayer) -> None:
         Input('your immediate action and long term strategy'),
     ]
     pl.tasks.append(Input('unpublished annotations'))
-    while True:
-        try:
-            match pl.char.control:
-                case 'console':
-                    await async_get_console_inputs(pl)
-                case 'ai':
-                    await async_get_ai_inputs(pl)
-                case 'file':
-                    await async_get_file_inputs(pl)
-                case _:
-                    raise NotImplementedError('unknown control')
-        except NotImplementedError as e:
-            raise
-        except Exception as e:
-            output_info(Info(pl.game, copy(pl.game.time), (pl,), (), repr(e)))
-        else:
-            output_str = ' --- '.join(
-                f'{i.prompt}: {o.output}' for i, o in zip(pl.tasks, pl.results)
-            )
-            output_info(
-                Info(
-                    pl.game,
-                    copy(pl.game.time),
-                    (pl,),
-                    (),
-                    f'[{pl.role.kind}] ~> {output_str}',
+    seen = len(pl.history)
+    error: FormatError | None = None
+    attempt = 0
+    with tracer.span(
+        'get_inputs',
+        seat=str(pl.seat),
+        role=pl.role.kind,
+        task=pl.tasks[3].prompt,
+    ):
+        while True:
+            try:
+                match pl.char.control:
+                    case 'console':
+                        await async_get_console_inputs(pl)
+                    case 'ai':
+                        await async_get_ai_inputs(pl, error, attempt)
+                    case 'file':
+                        await async_get_file_inputs(pl)
+                    case _:
+                        raise NotImplementedError('unknown control')
+            except NotImplementedError as e:
+                raise
+            except Exception as e:
+                output_info(
+                    Info(
+                        pl.game,
+                        pl.game.time,
+                        SeatSet((pl,)),
+                        SeatSet(),
+                        repr(e),
+                    )
                 )
-            )
-            (info, summary, strategy, *results, remarks) = pl.results
-            pl.tasks.clear()
-            pl.results = results
-            break
+                attempt += 1
+                if pl.char.control == 'ai' and attempt >= max_attempts:
+                    pl.results = [fallback(task) for task in pl.tasks]
+                    break
+                error = e if isinstance(e, FormatError) else None
+                if isinstance(e, APIError):
+                    await asyncio.sleep(backoff(attempt))
+            else:
+                break
+    output_str = ' --- '.join(
+        f'{i.prompt}: {o.output}' for i, o in zip(pl.tasks, pl.results)
+    )
+    output_info(
+        Info(
+            pl.game,
+            pl.game.time,
+            SeatSet((pl,)),
+            SeatSet(),
+            f'[{pl.role.kind}] ~> {output_str}',
+        )
+    )
+    (info, summary, strategy, *results, remarks) = pl.results
+    if summary.output:
+        pl.summary, pl.summarized = summary.output, seen
+    pl.tasks.clear()
+    pl.results = results
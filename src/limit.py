@@ -0,0 +1,57 @@
+from .header import *
+
+
+class Bucket:
+    def __init__(self, rate: float, burst: float) -> None:
+        self.rate = rate / 60
+        self.capacity = self.rate * burst
+        self.level = self.capacity
+        self.stamp = time.monotonic()
+
+    def reserve(self, amount: float, now: float) -> float:
+        self.level = min(
+            self.capacity, self.level + (now - self.stamp) * self.rate
+        )
+        self.stamp = now
+        self.level -= amount
+        return max(0.0, -self.level / self.rate)
+
+    def refund(self, amount: float) -> None:
+        self.level = min(self.capacity, self.level + amount)
+
+
+class Limiter:
+    def __init__(self, requests: float, tokens: float, burst: float) -> None:
+        self.requests = Bucket(requests, burst) if requests else None
+        self.tokens = Bucket(tokens, burst) if tokens else None
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.waited = 0.0
+
+    def __str__(self) -> str:
+        return f'{self.calls} calls, {self.waited:.1f}s queued'
+
+    def reserve(self, tokens: int) -> float:
+        with self.lock:
+            now = time.monotonic()
+            delay = 0.0
+            if self.requests:
+                delay = max(delay, self.requests.reserve(1, now))
+            if self.tokens:
+                delay = max(delay, self.tokens.reserve(tokens, now))
+            self.calls += 1
+            self.waited += delay
+            return delay
+
+    def settle(self, estimated: int, used: int) -> None:
+        if self.tokens:
+            with self.lock:
+                self.tokens.refund(estimated - used)
+
+    def acquire(self, tokens: int) -> None:
+        if delay := self.reserve(tokens):
+            time.sleep(delay)
+
+    async def async_acquire(self, tokens: int) -> None:
+        if delay := self.reserve(tokens):
+            await asyncio.sleep(delay)
@@ -0,0 +1,51 @@
+from .header import *
+
+
+labels = ('seat', 'role', 'phase', 'model')
+
+
+def to_json(calls: Iterable[Call]) -> str:
+    return json.dumps(
+        [asdict(call) for call in calls], ensure_ascii=False, indent=1
+    )
+
+
+def escape(value: Any) -> str:
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('"', '\\"')
+        .replace('\n', '\\n')
+    )
+
+
+def to_prometheus(calls: Iterable[Call], prefix: str = 'werewolf') -> str:
+    series: dict[str, defaultdict[tuple[str, ...], float]] = {
+        'calls_total': defaultdict(int),
+        'latency_seconds_total': defaultdict(float),
+        'queued_seconds_total': defaultdict(float),
+        'prompt_tokens_total': defaultdict(int),
+        'completion_tokens_total': defaultdict(int),
+        'cached_tokens_total': defaultdict(int),
+        'retries_total': defaultdict(int),
+        'parse_failures_total': defaultdict(int),
+    }
+    for call in calls:
+        key = tuple(escape(getattr(call, label)) for label in labels)
+        series['calls_total'][key] += 1
+        series['latency_seconds_total'][key] += call.latency
+        series['queued_seconds_total'][key] += call.queued
+        series['prompt_tokens_total'][key] += call.prompt_tokens
+        series['completion_tokens_total'][key] += call.completion_tokens
+        series['cached_tokens_total'][key] += call.cached_tokens
+        series['retries_total'][key] += call.retries
+        series['parse_failures_total'][key] += call.parse_failure
+    lines: list[str] = []
+    for name, values in series.items():
+        lines.append(f'# TYPE {prefix}_llm_{name} counter')
+        for key, total in sorted(values.items()):
+            pairs = ','.join(
+                f'{label}="{value}"' for label, value in zip(labels, key)
+            )
+            lines.append(f'{prefix}_llm_{name}{{{pairs}}} {total}')
+    return '\n'.join(lines) + '\n'
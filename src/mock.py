@@ -0,0 +1,21 @@
+from .header import *
+
+
+latency: Callable[[], float] = getattr(user_data, 'mock_latency', lambda: 0.0)
+
+
+def complete(pl: PPlayer) -> str:
+    return ' --- '.join(
+        random.choice(task.options) if task.options else f'{task.prompt}.'
+        for task in pl.tasks
+    )
+
+
+def input_mock(pl: PPlayer) -> str:
+    time.sleep(latency())
+    return complete(pl)
+
+
+async def async_input_mock(pl: PPlayer) -> str:
+    await asyncio.sleep(latency())
+    return complete(pl)
@@ -1,32 +1,34 @@
 from .header import *
 
-from .io import Input, Output, output_info, get_inputs, async_get_inputs
+from .io import Input, Output, output_info, async_get_inputs, render, sink
+from .io import cache, close_clients, emit, limiters, report, spill, tracer
+from .io import warm
 
 
-def empty(mark: Mark) -> None:
+async def empty(mark: Mark) -> None:
     pass
 
 
-def kill(mark: Mark) -> None:
+async def kill(mark: Mark) -> None:
     for t in mark.info.target:
         t.killed(mark)
 
 
-def filtration(mark: Mark, elem: str) -> None:
+async def filtration(mark: Mark, elem: str) -> None:
     for t in mark.info.target:
-        t.marks.reset(filter(lambda mark: mark.name != elem, t.marks))
+        t.marks.remove(elem)
 
 
-def expose(mark: Mark) -> None:
+async def expose(mark: Mark) -> None:
     game = mark.info.game
     for t in mark.info.target:
         t.killed(mark)
-        game.verdict()
+        await game.verdict()
         game.boardcast(
             game.audience(),
             f'Seat {t.seat} (a {t.role.faction}) self-exposed!',
         )
-    game.time.time_set(datetime.time(18))
+    game.time = game.time.time_set(18)
     raise TimeChangedError('expose')
 
 
@@ -40,12 +42,19 @@ class BPlayer:
         self.role = Role(role, role, role)
         self.skills: dict[str, Skill] = {}
         self.marks = Marks(self)
-        self.death = Marks(self)
+        self.death: list[Mark] = []
         self.tasks: list[Input] = []
         self.results: list[Output] = []
+        self.history: list[int] = []
+        self.messages = Transcript(game.info, self.history)
+        self.summary = ''
+        self.summarized = 0
+        self.anchor = (0, '')
 
         self.vote = 1.0
         self.can_expose = False
+        self.needs: tuple[str, ...] = ()
+        self.gives: tuple[str, ...] = ()
         self.skills['vote'] = kill
         self.skills['expose'] = expose
 
@@ -58,61 +67,77 @@ class BPlayer:
 
     @staticmethod
     def cast(info: Info) -> None:
-        info.game.info.append(info)
+        game = info.game
+        for pl in info.target:
+            pl.history.append(len(game.info))
+        game.info.append(info)
         output_info(info)
 
     def boardcast(self, pls: Iterable[PPlayer], content: str) -> None:
         info = Info(
-            self.game, copy(self.game.time), (self,), tuple(pls), content
+            self.game,
+            self.game.time,
+            SeatSet((self,)),
+            SeatSet(pls),
+            content,
         )
         self.cast(info)
 
     def receive(self, content: str) -> None:
-        info = Info(self.game, copy(self.game.time), (), (self,), content)
+        info = Info(
+            self.game,
+            self.game.time,
+            SeatSet(),
+            SeatSet((self,)),
+            content,
+        )
         self.cast(info)
 
-    def loop(self) -> None:
+    async def loop(self) -> None:
         if self.game.time.state == State.DAY:
-            self.day()
+            await self.day()
         elif self.game.time.state == State.NIGHT:
-            self.night()
+            await self.night()
 
-    def day(self) -> None:
+    async def day(self) -> None:
         ...
 
-    def night(self) -> None:
+    async def night(self) -> None:
         ...
 
     def dying(self) -> None:
         ...
 
     def verdict(self) -> None:
-        if all(pl.role.eq_faction(self.role) for pl in self.game.options):
+        factions = self.game.factions
+        if factions[self.role.faction] == factions.total():
             self.game.winner = self.role
-            self.game.time.state = State.END
+            self.game.time = self.game.time._replace(state=State.END)
             raise TimeChangedError('game over')
 
-    def exec(self) -> None:
-        self.marks.exec()
+    async def exec(self) -> None:
+        await self.marks.exec()
 
     def killed(self, mark: Mark) -> None:
         self.death.append(mark)
         if self.life:
-            self.game.died.append(self)
+            self.game.died |= SeatSet((self,))
             self.life = False
+            self.game.factions[self.role.faction] -= 1
+            self.game.categories[self.role.faction, self.role.category] -= 1
 
-    def expose(self) -> None:
-        self.marks.add_exec('expose', (self,))
+    async def expose(self) -> None:
+        await self.marks.add_exec('expose', (self,))
 
 
-def input_word(pl: PPlayer, prompt: str, option: Iterable[str]) -> str:
+async def input_word(pl: PPlayer, prompt: str, option: Iterable[str]) -> str:
     pl.tasks = [Input(prompt, tuple(option))]
-    get_inputs(pl)
+    await async_get_inputs(pl)
     (choice,) = pl.results
     return choice.output
 
 
-def input_op(
+async def input_op(
     pl: PPlayer,
     prompt: str,
     op1: Iterable[PPlayer] = [],
@@ -120,7 +145,7 @@ def input_op(
 ) -> str:
     lstr = LStr(pls2seats(op1))
     lstr.extend(LStr(op2))
-    return input_word(pl, prompt, lstr)
+    return await input_word(pl, prompt, lstr)
 
 
 async def async_input_words(
@@ -133,7 +158,7 @@ async def async_input_words(
     return (pl.results[0].output for pl in pls)
 
 
-def async_input_op(
+async def async_input_op(
     pls: Iterable[PPlayer],
     prompt: str,
     op1: Iterable[PPlayer] = [],
@@ -141,63 +166,65 @@ def async_input_op(
 ) -> Iterable[str]:
     lstr = LStr(pls2seats(op1))
     lstr.extend(LStr(op2))
-    return asyncio.run(async_input_words(pls, prompt, lstr))
+    return await async_input_words(pls, prompt, lstr)
 
 
-def input_speech(pl: PPlayer, prompt: str) -> str:
+async def input_speech(pl: PPlayer, prompt: str) -> str:
     pl.tasks = [Input(prompt)]
-    get_inputs(pl)
+    await async_get_inputs(pl)
     (speech,) = pl.results
     return speech.output
 
 
-def input_speech_quit(pl: PPlayer, prompt: str) -> tuple[str, str]:
+async def input_speech_quit(pl: PPlayer, prompt: str) -> tuple[str, str]:
     pl.tasks = [
         Input(prompt),
         Input('Will you quit the election?', ('quit', 'no')),
     ]
-    get_inputs(pl)
+    await async_get_inputs(pl)
     speech, quit = pl.results
     return speech.output, quit.output
 
 
-def input_speech_expose(pl: PPlayer, prompt: str) -> tuple[str, str]:
+async def input_speech_expose(pl: PPlayer, prompt: str) -> tuple[str, str]:
     pl.tasks = [
         Input(prompt),
         Input('Will you make a self-exposure?', ('expose', 'no')),
     ]
-    get_inputs(pl)
+    await async_get_inputs(pl)
     speech, expose = pl.results
     return speech.output, expose.output
 
 
-def input_speech_quit_expose(pl: PPlayer, prompt: str) -> tuple[str, str, str]:
+async def input_speech_quit_expose(
+    pl: PPlayer, prompt: str
+) -> tuple[str, str, str]:
     pl.tasks = [
         Input(prompt),
         Input('Will you quit the election?', ('quit', 'no')),
         Input('Will you make a self-exposure?', ('expose', 'no')),
     ]
-    get_inputs(pl)
+    await async_get_inputs(pl)
     speech, quit, expose = pl.results
     return speech.output, quit.output, expose.output
 
 
-def speech_expose(pl: PPlayer, prompt: str) -> str:
+async def speech_expose(pl: PPlayer, prompt: str) -> str:
     if pl.can_expose:
-        speech, expose = input_speech_expose(pl, prompt)
+        speech, expose = await input_speech_expose(pl, prompt)
         if expose != 'expose':
             return speech
-        pl.expose()
-    return input_speech(pl, prompt)
+        await pl.expose()
+    return await input_speech(pl, prompt)
 
 
-def speech_quit_expose(pl: PPlayer, prompt: str) -> tuple[str, str]:
+async def speech_quit_expose(pl: PPlayer, prompt: str) -> tuple[str, str]:
     if pl.can_expose:
-        speech, quit, expose = input_speech_quit_expose(pl, prompt)
+        speech, quit, expose = await input_speech_quit_expose(pl, prompt)
         if expose != 'expose':
             return speech, quit
-        pl.expose()
-    return input_speech_quit(pl, prompt)
+        await pl.expose()
+    return await input_speech_quit(pl, prompt)
 
 
 class Villager(BPlayer):
@@ -210,24 +237,23 @@ class Werewolf(BPlayer):
         if user_data.allow_exposure:
             self.can_expose = True
         self.skills['claw'] = kill
+        self.gives = ('claw',)
 
     def verdict(self) -> None:
         if user_data.win_condition == 'all':
             super().verdict()
             return
-        pls = list(
-            filter(
-                lambda pl: not pl.role.eq_faction(self.role), self.game.options
-            )
-        )
-        if not pls or all(pl.role.eq_category(pls[0].role) for pl in pls):
+        others = [
+            category
+            for category, num in self.game.categories.items()
+            if num and category[0] != self.role.faction
+        ]
+        if len(others) <= 1:
             self.game.winner = self.role
-            self.game.time.state = State.END
-            TimeChangedError('game over')
+            self.game.time = self.game.time._replace(state=State.END)
+            raise TimeChangedError('game over')
 
-    def night(self) -> None:
-        if self.game.time.datetime.time() != datetime.time(0):
-            return
+    async def night(self) -> None:
         actors = list(
             filter(lambda pl: pl.role.faction == 'werewolf', self.game.options)
         )
@@ -240,9 +266,9 @@ class Werewolf(BPlayer):
         for pl in actors:
             if len(actors) == 1:
                 break
-            speech = input_speech(pl, 'talk with your teammates')
+            speech = await input_speech(pl, 'talk with your teammates')
             pl.boardcast(actors, speech)
-        targets = self.game.vote(
+        targets = await self.game.vote(
             self.game.options,
             actors,
             'choose one player to kill secretly',
@@ -257,12 +283,12 @@ class Werewolf(BPlayer):
         self.game.boardcast(actors, f'Werewolves kill seat {target.seat}.')
 
 
-def white(mark: Mark) -> None:
+async def white(mark: Mark) -> None:
     game = mark.info.game
     for t in mark.info.target:
         t.killed(mark)
-        game.verdict()
-        choice = input_op(
+        await game.verdict()
+        choice = await input_op(
             t,
             'you are dying, pass or choose a player to kill',
             game.options,
@@ -284,7 +310,7 @@ def white(mark: Mark) -> None:
                 f'Seat {t.seat} killed seat {pl.seat}.',
             )
             pl.killed(mark)
-    game.time.time_set(datetime.time(18))
+    game.time = game.time.time_set(18)
     raise TimeChangedError('expose')
 
 
@@ -297,7 +323,7 @@ class WhiteWolf(Werewolf):
         self.skills['expose'] = white
 
 
-def seer(mark: Mark) -> None:
+async def seer(mark: Mark) -> None:
     for s, t in zip(mark.info.source, mark.info.target):
         s.receive(f'Seat {t.seat} is a {t.role.faction}.')
 
@@ -310,15 +336,13 @@ class Seer(BPlayer):
 
         self.skills['seer'] = seer
 
-    def night(self) -> None:
-        if self.game.time.datetime.time() != datetime.time(0):
-            return
+    async def night(self) -> None:
         self.receive('Seer, please open your eyes!')
-        choice = input_op(
+        choice = await input_op(
             self, 'the player you want to check', self.game.options
         )
         pl = str2pl(self.game, choice)
-        pl.marks.add_exec('seer', (self,))
+        await pl.marks.add_exec('seer', (self,))
 
 
 class Witch(BPlayer):
@@ -331,17 +355,14 @@ class Witch(BPlayer):
         self.poison = True
         self.skills['antidote'] = functools.partial(filtration, elem='claw')
         self.skills['poison'] = kill
+        self.needs = ('claw',)
+        self.gives = ('antidote', 'poison')
 
-    def night(self) -> None:
-        if self.game.time.datetime.time() != datetime.time(1):
-            return
+    async def night(self) -> None:
         self.receive('Witch, please open your eyes!')
         target: PPlayer | None = None
-        for mark in itertools.chain.from_iterable(
-            pl.marks for pl in self.game.options
-        ):
-            if mark.name == 'claw':
-                target = mark.info.target[0]
+        for mark in self.game.pending['claw'].values():
+            (target,) = mark.info.target
         if self.antidote:
             target_str = f'seat {target.seat}' if target else 'nobody'
             self.receive(
@@ -353,23 +374,20 @@ class Witch(BPlayer):
         antidote = (
             self.antidote
             and target
-            and not (
-                target == self
-                and self.game.time.datetime.day != self.game.time.start.day + 1
-            )
+            and not (target == self and self.game.time.day != 1)
         )
         poison = self.poison
         if antidote and poison:
-            choice = input_op(
+            choice = await input_op(
                 self,
                 'pass, save, or choose a player to poison',
                 self.game.options,
                 ('save', 'pass'),
             )
         elif antidote:
-            choice = input_op(self, 'pass or save', op2=('save', 'pass'))
+            choice = await input_op(self, 'pass or save', op2=('save', 'pass'))
         elif poison:
-            choice = input_op(
+            choice = await input_op(
                 self,
                 'pass or choose a player to poison',
                 self.game.options,
@@ -390,13 +408,13 @@ class Witch(BPlayer):
             pl.marks.add('poison', (self,), 1)
 
 
-def gun(mark: Mark) -> None:
+async def gun(mark: Mark) -> None:
     game = mark.info.game
     for s in mark.info.source:
         game.boardcast(game.audience(), f'Seat {s.seat} has a gun!')
         if any('poison' == mark.name for mark in s.death):
             return
-        choice = input_op(
+        choice = await input_op(
             s,
             'you are dying, pass or choose a player to shoot',
             game.options,
@@ -440,12 +458,12 @@ class BlackWolf(Werewolf, Hunter):
         self.role.faction = 'werewolf'
 
 
-def shield(mark: Mark) -> None:
+async def shield(mark: Mark) -> None:
     for t in mark.info.target:
-        if any(mark.name == 'antidote' for mark in t.marks):
-            filtration(mark, 'antidote')
+        if 'antidote' in t.marks:
+            await filtration(mark, 'antidote')
             return
-        filtration(mark, 'werewolf')
+        await filtration(mark, 'werewolf')
 
 
 class Guard(BPlayer):
@@ -456,15 +474,14 @@ class Guard(BPlayer):
 
         self.guard: PPlayer | None = None
         self.skills['shield'] = shield
+        self.gives = ('shield',)
 
-    def night(self) -> None:
-        if self.game.time.datetime.time() != datetime.time(23):
-            return
+    async def night(self) -> None:
         self.receive('Guard, please open your eyes!')
         options = list(
             filter(lambda option: option != self.guard, self.game.options)
         )
-        choice = input_op(
+        choice = await input_op(
             self, 'who will you protect tonight?', options, ('pass',)
         )
         if choice == 'pass':
@@ -475,7 +492,7 @@ class Guard(BPlayer):
         pl.marks.add('shield', (self,), priority=2)
 
 
-def vote_fool(mark: Mark) -> None:
+async def vote_fool(mark: Mark) -> None:
     game = mark.info.game
     for t in mark.info.target:
         if not isinstance(t, Fool):
@@ -495,7 +512,7 @@ class Fool(BPlayer):
         self.skills['vote'] = vote_fool
 
 
-def duel(mark: Mark) -> None:
+async def duel(mark: Mark) -> None:
     game = mark.info.game
     for s in mark.info.source:
         s.can_expose = False
@@ -503,7 +520,7 @@ def duel(mark: Mark) -> None:
             game.audience(),
             f'Seat {s.seat} (a {s.role.kind}) self-exposed!',
         )
-        choice = input_op(
+        choice = await input_op(
             s,
             'choose a player to duel',
             game.options,
@@ -519,7 +536,7 @@ def duel(mark: Mark) -> None:
                 f'Seat {pl.seat} is a werewolf',
             )
             pl.killed(mark)
-            game.time.time_set(datetime.time(18))
+            game.time = game.time.time_set(18)
             raise TimeChangedError('expose')
         else:
             game.boardcast(
@@ -527,7 +544,7 @@ def duel(mark: Mark) -> None:
                 f'Seat {pl.seat} is not a werewolf',
             )
             s.killed(mark)
-            game.died.remove(s)
+            game.died -= SeatSet((s,))
 
 
 class Knight(BPlayer):
@@ -545,23 +562,24 @@ class Badge:
         self.owner: PPlayer | None = None
         self.game = game
 
-    def election(self) -> None:
-        candidates: list[PPlayer] = []
-        quitters: list[PPlayer] = []
+    async def election(self) -> None:
+        quitters = SeatSet()
         self.game.boardcast(
             self.game.audience(),
             "It's time to run for the sheriff.",
         )
-        choices = async_input_op(
+        choices = await async_input_op(
             self.game.options,
             'Will you participate in the sheriff election?',
             op2=('yes', 'no'),
         )
 
-        for pl, choice in zip(self.game.options, choices):
-            if choice == 'yes':
-                candidates.append(pl)
-        voters = [pl for pl in self.game.options if pl not in candidates]
+        candidates = SeatSet(
+            pl
+            for pl, choice in zip(self.game.options, choices)
+            if choice == 'yes'
+        )
+        voters = self.game.options - candidates
         if not candidates:
             self.game.boardcast(
                 self.game.audience(),
@@ -579,7 +597,7 @@ class Badge:
             f'Sheriff candidates are seat {pls2str(candidates)}.',
         )
         for pl in candidates:
-            speech, quit = speech_quit_expose(
+            speech, quit = await speech_quit_expose(
                 pl, 'Give a campaign speech for the sheriff election.'
             )
             if quit == 'quit':
@@ -587,10 +605,10 @@ class Badge:
                     self.game.audience(),
                     f'Seat {pl.seat} quit the election.',
                 )
-                quitters.append(pl)
+                quitters |= SeatSet((pl,))
                 continue
             pl.boardcast(self.game.audience(), speech)
-        candidates = [pl for pl in candidates if pl not in quitters]
+        candidates -= quitters
         if not candidates:
             self.game.boardcast(
                 self.game.audience(),
@@ -602,7 +620,7 @@ class Badge:
             self.game.audience(),
             f'Sheriff candidates are seat {pls2str(candidates)}.',
         )
-        targets = self.game.vote(
+        targets = await self.game.vote(
             candidates,
             voters,
             'your vote to elect the sheriff',
@@ -613,15 +631,15 @@ class Badge:
             target = targets[0]
             self.owner = target
             target.vote = 1.5
-            user_data.election_round = 0
+            self.game.election_round = 0
         else:
             targets.reverse()
             for pl in targets:
-                speech = speech_expose(
+                speech = await speech_expose(
                     pl, 'Give the additional campaign speech.'
                 )
                 pl.boardcast(self.game.audience(), speech)
-            targets = self.game.vote(
+            targets = await self.game.vote(
                 targets, voters, 'vote again to elect the sheriff'
             )
             if not targets:
@@ -630,11 +648,11 @@ class Badge:
                 target = targets[0]
                 self.owner = target
                 target.vote = 1.5
-                user_data.election_round = 0
+                self.game.election_round = 0
             else:
                 pass
 
-    def transfer(self) -> None:
+    async def transfer(self) -> None:
         if not self.owner:
             return
         if self.owner.life == False:
@@ -642,7 +660,7 @@ class Badge:
                 self.game.audience(),
                 'The former sheriff is passing the badge.',
             )
-            choice = input_op(
+            choice = await input_op(
                 self.owner,
                 'You are dying. Say "destroy" to destroy the badge or choose a player to transfer the badge.',
                 self.game.options,
@@ -662,21 +680,21 @@ class Badge:
                 f'The badge was passed to seat {pl.seat}.',
             )
 
-    def speakers(self) -> list[PPlayer]:
+    async def speakers(self) -> list[PPlayer]:
         if not self.owner:
-            return self.game.options
+            return list(self.game.options)
 
-        speakers = copy(self.game.options)
+        speakers = list(self.game.options)
         if len(self.game.died) == 1:
-            reference = self.game.died[0]
-            choice = input_op(
+            (reference,) = self.game.died
+            choice = await input_op(
                 self.owner,
                 f'Choose the left/right side of seat {reference.seat} as the first speaker.',
                 op2=('left', 'right'),
             )
         else:
             reference = self.owner
-            choice = input_op(
+            choice = await input_op(
                 self.owner,
                 'Choose your left/right side as the first speaker.',
                 op2=('left', 'right'),
@@ -694,19 +712,26 @@ class Badge:
 
 
 class Game:
+    day_hours = (6, 7, 8, 9, 12, 13, 14)
+    night_hours = (18, 0)
+
     def __init__(
         self, chars: Iterable[Char], roles: Iterable[type[PPlayer]]
     ) -> None:
         self.chars = list(chars)
         self.roles = list(roles)
-        self.time = Time()
+        self.time = Time.begin()
         self.players: list[PPlayer] = []
-        self.info: list[Info] = []
+        self.info = InfoStore(self, render, spill)
         self.badge: PBadge = Badge(self)
+        self.election_round = user_data.election_round
+        self.usage: Counter[str] = Counter()
+        self.metrics: list[Call] = []
+        self.pending: defaultdict[str, dict[int, Mark]] = defaultdict(dict)
 
         self.winner = Role('')
-        self.options: list[PPlayer] = []
-        self.died: list[PPlayer] = []
+        self.options = SeatSet()
+        self.died = SeatSet()
 
         ran_chars = copy(self.chars)
         ran_roles = copy(self.roles)
@@ -714,36 +739,62 @@ class Game:
         random.shuffle(ran_roles)
         for seat, (char, Pl) in enumerate(zip(ran_chars, ran_roles)):
             self.players.append(Pl(self, char, Seat(seat)))
-        self.verdict()
+        self.options = SeatSet(self.alived())
+        self.factions = Counter(pl.role.faction for pl in self.players)
+        self.categories = Counter(
+            (pl.role.faction, pl.role.category) for pl in self.players
+        )
+        self.hours = {*self.day_hours, *self.night_hours}
+        self.daytime = SeatSet(
+            pl for pl in self.players if type(pl).day is not BPlayer.day
+        )
 
     def __str__(self) -> str:
         info_player = '\n\t'.join(str(pl) for pl in self.players)
         return f'players: \n\t{info_player}'
 
     def boardcast(self, pls: Iterable[PPlayer], content: str) -> None:
-        info = Info(self, copy(self.time), (), tuple(pls), content)
+        info = Info(self, self.time, SeatSet(), SeatSet(pls), content)
         BPlayer.cast(info)
 
     def unicast(self, pl: PPlayer, content: str) -> None:
-        info = Info(self, copy(self.time), (), (pl,), content)
+        info = Info(self, self.time, SeatSet(), SeatSet((pl,)), content)
         BPlayer.cast(info)
 
-    def loop(self) -> None:
+    def emit(
+        self,
+        kind: str,
+        time: Time,
+        source: SeatSet,
+        target: SeatSet,
+        content: str,
+        **extra: Any,
+    ) -> None:
+        emit(kind, time, source, target, content, **extra)
+
+    async def loop(self) -> None:
+        try:
+            await self.play()
+        finally:
+            sink.close()
+            await close_clients()
+
+    async def play(self) -> None:
+        await warm(
+            pl.char.model for pl in self.players if pl.char.control == 'ai'
+        )
         start_message = f"players: \n\t{'\n\t'.join(pl.str_public() for pl in self.players)}"
         output_info(
             Info(
                 self,
-                copy(self.time),
-                (),
-                tuple(self.audience()),
+                self.time,
+                SeatSet(),
+                SeatSet(self.audience()),
                 f'{start_message}\n',
             ),
             console=True,
             clear_text=f'Please wait...\nThe upper line for input.\n',
         )
-        for pl in self.players:
-            self.unicast(pl, f'You are a {pl.role.kind}.')
-
         roles_counter = Counter(self.roles)
         setup = ', '.join(
             f'{num} {Pl.__name__.lower()}' for Pl, num in roles_counter.items()
@@ -754,31 +805,43 @@ class Game:
             f'The game setup is {setup}. '
             f'Players list from seat 1 to {len(self.players)}.',
         )
+        for pl in self.players:
+            self.unicast(pl, f'You are a {pl.role.kind}.')
 
         while True:
+            sink.flush()
             try:
                 match self.time.state:
                     case State.BEGIN:
-                        self.time.time_set(datetime.time(18))
+                        await self.verdict()
+                        self.time = self.time.time_set(18)
                         raise TimeChangedError('begin')
                     case State.DAY:
-                        self.day()
+                        with tracer.span(
+                            f'day {self.time.hour}',
+                            step=self.time.step,
+                        ):
+                            await self.day()
                     case State.NIGHT:
-                        self.night()
+                        with tracer.span(
+                            f'night {self.time.hour}',
+                            step=self.time.step,
+                        ):
+                            await self.night()
                     case State.END:
                         break
             except TimeChangedError as e:
                 try:
                     while self.died:
-                        self.verdict()
+                        await self.verdict()
                         for pl in self.died:
                             pl.dying()
-                        self.died.clear()
-                        self.exec()
+                        self.died = SeatSet()
+                        await self.exec()
                 except TimeChangedError as e:
                     pass
             else:
-                self.time.time_inc()
+                self.time = self.time.time_skip(self.hours)
 
         end_message = (
             f'{self.winner.faction} win.\n'
@@ -790,28 +853,40 @@ class Game:
             )
             + '\n'
             + str(self)
+            + (f'\n{cache}' if cache else '')
+            + (f'\nusage: {dict(self.usage)}' if self.usage else '')
+            + ''.join(
+                f'\nrate limit {model}@{base_url}: {limiter}'
+                for (base_url, model), limiter in limiters.items()
+                if limiter.requests or limiter.tokens
+            )
         )
         output_info(
             Info(
-                self, copy(self.time), (), tuple(self.audience()), end_message
+                self,
+                self.time,
+                SeatSet(),
+                SeatSet(self.audience()),
+                end_message,
             ),
             console=True,
         )
+        report(self.metrics)
+        sink.flush()
 
-    def day(self) -> None:
-        match self.time.datetime.hour:
+    async def day(self) -> None:
+        match self.time.hour:
             case 6:
                 self.boardcast(
                     self.audience(),
                     "It's daytime. Everyone woke up.",
                 )
             case 7:  # sheriff
-                if user_data.election_round:
-                    user_data.election_round -= 1
-                    self.badge.election()
+                if self.election_round:
+                    self.election_round -= 1
+                    await self.badge.election()
             case 8:  # announcement
-                self.exec()
-                self.died.sort(key=lambda pl: pl.seat)
+                await self.exec()
                 self.boardcast(
                     self.audience(),
                     (
@@ -823,20 +898,20 @@ class Game:
                 )
             case 9:  # verdict
                 while self.died:
-                    self.verdict()
-                    if self.time.datetime.day == self.time.start.day + 1:
-                        self.testament()
+                    await self.verdict()
+                    if self.time.day == 1:
+                        await self.testament()
                     for pl in self.died:
                         pl.dying()
-                    self.died.clear()
-                    self.exec()
+                    self.died = SeatSet()
+                    await self.exec()
             case 12:  # speech
-                speakers = self.badge.speakers()
+                speakers = await self.badge.speakers()
                 for pl in speakers:
-                    speech = speech_expose(pl, 'make a public speaking')
+                    speech = await speech_expose(pl, 'make a public speaking')
                     pl.boardcast(self.audience(), speech)
             case 13:  # vote
-                targets = self.vote(
+                targets = await self.vote(
                     self.options,
                     self.options,
                     'your vote to eliminate a player',
@@ -849,9 +924,11 @@ class Game:
                 else:
                     targets.reverse()
                     for pl in targets:
-                        speech = speech_expose(pl, 'extra public speaking')
+                        speech = await speech_expose(
+                            pl, 'extra public speaking'
+                        )
                         pl.boardcast(self.audience(), speech)
-                    targets = self.vote(
+                    targets = await self.vote(
                         targets,
                         self.options,
                         'vote again to eliminate a player',
@@ -861,52 +938,73 @@ class Game:
                     elif len(targets) == 1:
                         target = targets[0]
                         target.marks.add('vote', self.options)
-                self.exec()
+                await self.exec()
             case 14:  # verdict
                 while self.died:
-                    self.verdict()
-                    self.testament()
+                    await self.verdict()
+                    await self.testament()
                     for pl in self.died:
                         pl.dying()
-                    self.died.clear()
-                    self.exec()
-        for pl in self.options:
-            pl.day()
+                    self.died = SeatSet()
+                    await self.exec()
+        for pl in self.options & self.daytime:
+            await pl.day()
 
-    def night(self) -> None:
-        match self.time.datetime.hour:
+    async def night(self) -> None:
+        match self.time.hour:
             case 18:
                 self.boardcast(
                     self.audience(),
                     f"It's dark, Everyone close your eyes. Seat {pls2str(self.alived())} are still alive.",
                 )
-        for pl in self.options:
-            pl.night()
+            case 0:
+                await self.schedule()
 
-    def verdict(self) -> None:
-        self.options = list(self.alived())
+    async def schedule(self) -> None:
+        pending = Counter(name for pl in self.options for name in pl.gives)
+        events = {name: asyncio.Event() for name in pending}
+
+        async def act(pl: PPlayer) -> None:
+            for name in pl.needs:
+                if name in events:
+                    await events[name].wait()
+            try:
+                await pl.night()
+            finally:
+                for name in pl.gives:
+                    pending[name] -= 1
+                    if not pending[name]:
+                        events[name].set()
+
+        await asyncio.gather(*(act(pl) for pl in self.options))
+
+    async def verdict(self) -> None:
+        self.options = SeatSet(self.alived())
+        if not self.options:
+            self.winner = Role('nobody', 'nobody', 'nobody')
+            self.time = self.time._replace(state=State.END)
+            raise TimeChangedError('game over')
         for pl in self.options:
             pl.verdict()
-        self.badge.transfer()
+        await self.badge.transfer()
 
-    def exec(self) -> None:
+    async def exec(self) -> None:
         for pl in self.players:
-            pl.exec()
+            await pl.exec()
 
-    def testament(self) -> None:
+    async def testament(self) -> None:
         if not self.died:
             raise RuntimeError('no died')
-        self.died.sort(key=lambda pl: pl.seat)
         self.boardcast(
             self.audience(), f'Seat {pls2str(self.died)} are dying.'
         )
         for pl in self.died:
-            speech = input_speech(
+            speech = await input_speech(
                 pl, 'you are dying, make the last public speaking'
             )
             pl.boardcast(self.audience(), speech)
 
-    def vote(
+    async def vote(
         self,
         candidates_iter: Iterable[PPlayer],
         voters_iter: Iterable[PPlayer],
@@ -918,7 +1016,7 @@ class Game:
         ballot = {pl: 0.0 for pl in candidates}
         abstain = 0
         vote_text = ''
-        votes = async_input_op(voters, task, candidates, ('pass',))
+        votes = await async_input_op(voters, task, candidates, ('pass',))
         for pl, vote in zip(voters, votes):
             sign = ''
             if pl.vote == 1.5:
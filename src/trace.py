@@ -0,0 +1,72 @@
+from .header import *
+
+
+class Tracer:
+    def __init__(self, enabled: bool) -> None:
+        self.enabled = enabled
+        self.pid = os.getpid()
+        self.start = time.perf_counter()
+        self.events: list[dict[str, Any]] = []
+        self.tids: weakref.WeakKeyDictionary[
+            asyncio.Task[Any], int
+        ] = weakref.WeakKeyDictionary()
+        self.count = itertools.count(1)
+
+    def tid(self) -> int:
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        if task is None:
+            return 0
+        if tid := self.tids.get(task):
+            return tid
+        tid = self.tids[task] = next(self.count)
+        self.events.append(
+            {
+                'name': 'thread_name',
+                'ph': 'M',
+                'pid': self.pid,
+                'tid': tid,
+                'args': {'name': task.get_name()},
+            }
+        )
+        return tid
+
+    @contextlib.contextmanager
+    def span(self, name: str, **args: Any) -> Generator[None]:
+        if not self.enabled:
+            yield
+            return
+        tid = self.tid()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.events.append(
+                {
+                    'name': name,
+                    'ph': 'X',
+                    'ts': (start - self.start) * 1e6,
+                    'dur': (time.perf_counter() - start) * 1e6,
+                    'pid': self.pid,
+                    'tid': tid,
+                    'args': args,
+                }
+            )
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {'traceEvents': self.events, 'displayTimeUnit': 'ms'},
+            ensure_ascii=False,
+            default=str,
+        )
+
+    def clear(self) -> None:
+        self.start = time.perf_counter()
+        self.events.clear()
+        self.tids.clear()
+        self.count = itertools.count(1)
+
+
+tracer = Tracer(getattr(user_data, 'trace', False))
@@ -0,0 +1,36 @@
+import random
+import sys
+import types
+
+import pytest
+
+user_data = types.ModuleType('src.user_data')
+user_data.DEBUG = False
+user_data.api_key = ''
+user_data.base_url = 'http://127.0.0.1:9/v1'
+user_data.win_condition = 'all'
+user_data.allow_exposure = True
+user_data.election_round = 1
+user_data.language = 'English'
+user_data.additional_prompt = ''
+user_data.backend = 'mock'
+sys.modules['src.user_data'] = user_data
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    from src.io import sink
+
+    monkeypatch.chdir(tmp_path)
+    yield tmp_path
+    sink.close()
+
+
+@pytest.fixture
+def game():
+    from src.header import Char
+    from src.player import Game, Seer, Villager, Werewolf
+
+    random.seed(0)
+    chars = [Char(f'p{i}', 'ai', 'mock') for i in range(10)]
+    return Game(chars, [Villager] * 5 + [Werewolf] * 3 + [Seer] * 2)
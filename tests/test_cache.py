@@ -0,0 +1,26 @@
+from src.cache import Cache
+
+
+def test_evicts_least_recently_used(workdir):
+    cache = Cache(str(workdir / 'cache.db'), 10)
+    for i in range(10):
+        cache.put(f'k{i}', f'v{i}')
+    assert cache.get('k0') == 'v0'
+    cache.put('k10', 'v10')
+    assert cache.get('k0') == 'v0'
+    assert cache.get('k1') is None
+    assert cache.get('k2') is None
+    assert cache.get('k10') == 'v10'
+    for i in range(11, 40):
+        cache.put(f'k{i}', f'v{i}')
+    (count,) = cache.db.execute('SELECT COUNT(*) FROM cache').fetchone()
+    assert count <= 10
+    assert cache.get('k39') == 'v39'
+
+
+def test_shared_between_connections(workdir):
+    path = str(workdir / 'cache.db')
+    first, second = Cache(path, 100), Cache(path, 100)
+    first.put('key', 'content')
+    assert second.get('key') == 'content'
+    assert str(second) == 'cache: 1 hits, 0 misses'
@@ -0,0 +1,50 @@
+from src.events import encode, read, read_all
+from src.header import SeatSet, Time
+
+
+def write(path, records):
+    with open(path, 'w', encoding='utf-8') as file:
+        for kind, content in records:
+            file.write(encode(kind, Time(), SeatSet(), SeatSet(), content))
+
+
+def test_read_filters_kinds(workdir):
+    path = workdir / 'events.jsonl'
+    write(
+        path,
+        [
+            ('info', 'a'),
+            ('call', 'b'),
+            ('callback', 'c'),
+            ('mark', 'd'),
+            ('info', '"kind":"call",'),
+        ],
+    )
+    assert [e['content'] for e in read(path)] == [
+        'a',
+        'b',
+        'c',
+        'd',
+        '"kind":"call",',
+    ]
+    assert [e['content'] for e in read(path, ('call',))] == ['b']
+    events = list(read(path, ('info', 'mark')))
+    assert [e['kind'] for e in events] == ['info', 'mark', 'info']
+    assert events[0] == {
+        'kind': 'info',
+        'step': 0,
+        'day': 0,
+        'hour': 0,
+        'state': 'begin',
+        'source': [],
+        'target': [],
+        'content': 'a',
+    }
+
+
+def test_read_all_streams_files_in_order(workdir):
+    paths = [workdir / f'{i}.jsonl' for i in range(3)]
+    for i, path in enumerate(paths):
+        write(path, [('call', str(i)), ('info', 'x')])
+    calls = read_all(iter(paths), kinds=iter(['call']))
+    assert [e['content'] for e in calls] == ['0', '1', '2']
@@ -0,0 +1,162 @@
+import asyncio
+import datetime
+
+from src.header import Info, InfoStore, Mark, Seat, SeatSet, State, Time
+from src.io import render
+
+
+def test_seat_set_operators(game):
+    pls = game.players
+    odd = SeatSet(pls[1::2])
+    low = SeatSet(pls[:4])
+    assert len(odd) == 5 and bool(odd) and not SeatSet()
+    assert list(odd) == pls[1::2]
+    assert list(odd.seats()) == [Seat(1), Seat(3), Seat(5), Seat(7), Seat(9)]
+    assert list(odd | low) == [pls[i] for i in (0, 1, 2, 3, 5, 7, 9)]
+    assert list(odd & low) == [pls[1], pls[3]]
+    assert list(odd - low) == [pls[5], pls[7], pls[9]]
+    assert list(SeatSet() | low) == pls[:4]
+    assert str(low - low) == str(SeatSet())
+
+
+def test_seat_set_membership_and_hash(game):
+    pls = game.players
+    seats = SeatSet(pls[2:5])
+    assert pls[3] in seats and pls[5] not in seats
+    assert 4 in seats and Seat(1) not in seats and 'x' not in seats
+    assert seats == SeatSet(reversed(pls[2:5]))
+    assert seats != SeatSet(pls[2:4])
+    assert {seats: 1}[SeatSet.from_mask(pls, 0b11100)] == 1
+    assert SeatSet((pls[9],)).mask == 1 << 9
+
+
+def infos(game, count):
+    pls = game.players
+    time = game.time
+    for i in range(count):
+        time = time.time_inc()
+        yield Info(
+            game,
+            time,
+            SeatSet((pls[i % 10],)),
+            SeatSet(pls[: i % 10 + 1]),
+            f'info {i} ' * (i % 7) or 'short',
+        )
+
+
+def same(info, other):
+    return (
+        info.time.step == other.time.step
+        and info.time.day == other.time.day
+        and info.time.hour == other.time.hour
+        and info.time.state == other.time.state
+        and info.source == other.source
+        and info.target == other.target
+        and info.content == other.content
+    )
+
+
+def test_info_store_round_trip(game):
+    store = InfoStore(game, render)
+    written = list(infos(game, 50))
+    for info in written:
+        store.append(info)
+    assert len(store) == 50
+    assert all(same(a, b) for a, b in zip(store, written))
+    assert same(store[-1], written[-1])
+    assert list(store[3].target) == game.players[:4]
+    assert store.offsets[0] == store.offsets[7]
+    assert store.message(5) is store.message(5)
+    assert store.message(5)['content'].endswith(written[5].content)
+
+
+def test_day_one_and_time_skip():
+    hours = {6, 7, 8, 9, 12, 13, 14, 18, 0}
+    begin = Time.begin()
+    time = begin.time_set(18)
+    assert (time.day, time.hour, time.state) == (0, 18, State.NIGHT)
+    time = time.time_skip(hours)
+    assert (time.day, time.hour, time.state) == (1, 0, State.NIGHT)
+    time = time.time_skip(hours)
+    assert (time.day, time.hour, time.state) == (1, 6, State.DAY)
+    assert time.to_datetime().date() == (
+        begin.start.date() + datetime.timedelta(days=1)
+    )
+    for hour in (7, 8, 9, 12, 13, 14, 18, 0):
+        time = time.time_skip(hours)
+        assert time.hour == hour
+    assert time.day == 2
+    assert time.step == 11
+    assert time.time_skip((0,)).day == 3
+    assert time.time_add(30).hour == 6 and time.time_add(30).day == 3
+
+
+def test_time_is_immutable_and_compared_by_step():
+    time = Time.begin()
+    later = time.time_inc()
+    assert time.step == 0 and later.step == 1
+    assert later == later._replace(hour=3) and later != time
+    assert len({time, later, later._replace(day=9)}) == 2
+    assert later.eq_state(later.time_add(24)) is False
+
+
+def test_info_store_spills_to_mapped_file(game):
+    store = InfoStore(game, render, spill=64)
+    written = list(infos(game, 50))
+    for info in written:
+        store.append(info)
+    assert store.map is not None and store.spilled > 0
+    assert len(store.text) <= 64
+    assert all(same(a, b) for a, b in zip(store, written))
+    spilled = next(i for i, o in enumerate(store.offsets) if o == 0)
+    assert store.message(spilled) == store.message(spilled)
+    assert spilled not in store.rendered
+    store.append(written[-1]._replace(content='resident'))
+    assert store[-1].content == 'resident'
+    assert store.message(50) is store.message(50)
+
+
+def test_info_store_caches_only_recent_messages(game):
+    store = InfoStore(game, render)
+    for info in infos(game, 200):
+        store.append(info)
+        store.message(len(store) - 1)
+    assert len(store.rendered) == store.render_size
+    assert store.message(0) == render(store[0])
+    assert 0 not in store.rendered
+    assert store.message(199) is store.message(199)
+
+
+def test_marks_pop_by_priority_then_latest(game):
+    pl, source = game.players[0], game.players[1]
+    order = []
+
+    async def record(mark):
+        order.append((mark.name, mark.priority, mark.info.content))
+
+    for name in ('low', 'high', 'gone'):
+        pl.skills[name] = record
+    for priority, name, content in [
+        (0, 'low', 'first'),
+        (5, 'high', 'first'),
+        (0, 'low', 'second'),
+        (3, 'gone', ''),
+        (5, 'high', 'second'),
+        (3, 'gone', ''),
+    ]:
+        info = Info(game, game.time, SeatSet((source,)), SeatSet((pl,)))
+        pl.marks.push(Mark(name, info._replace(content=content), priority))
+    assert len(pl.marks) == 6 and 'gone' in pl.marks
+    assert len(game.pending['gone']) == 2
+    pl.marks.remove('gone')
+    assert 'gone' not in pl.marks and not game.pending['gone']
+    assert len(pl.marks.heap) == 6
+    asyncio.run(pl.marks.exec())
+    assert order == [
+        ('high', 5, 'second'),
+        ('high', 5, 'first'),
+        ('low', 0, 'second'),
+        ('low', 0, 'first'),
+    ]
+    assert not pl.marks and not pl.marks.heap
+    assert not game.pending['low'] and not game.pending['high']
@@ -0,0 +1,116 @@
+import asyncio
+import pathlib
+import threading
+import types
+
+import pytest
+
+from src import io
+
+
+def message(i):
+    return {'role': 'user', 'content': str(i)}
+
+
+def test_recall_since_summary(monkeypatch):
+    monkeypatch.setattr(io, 'memory', 4)
+    pl = types.SimpleNamespace(
+        messages=[message(i) for i in range(10)],
+        summary='s',
+        summarized=8,
+        anchor=(0, ''),
+    )
+    summary, *rest = io.recall(pl)
+    assert summary['content'].endswith(': s')
+    assert rest == [message(8), message(9)]
+    pl.summarized = 3
+    summary, *rest = io.recall(pl)
+    assert rest == [message(i) for i in range(6, 10)]
+
+
+def test_watcher_wakes_on_write(workdir):
+    path = workdir / 'seat.txt'
+    path.write_text('', encoding='utf-8')
+    watcher = io.Watcher(path)
+
+    async def main():
+        waiting = asyncio.create_task(watcher.async_wait())
+        await asyncio.sleep(0.01)
+        assert not waiting.done()
+        path.write_text('answer\n', encoding='utf-8')
+        await asyncio.wait_for(waiting, 1)
+
+    try:
+        asyncio.run(main())
+    finally:
+        watcher.close()
+
+
+def test_cancelled_budget_wait_returns_permit(monkeypatch):
+    budget = threading.BoundedSemaphore(1)
+    monkeypatch.setattr(io, 'budget', budget)
+
+    async def request():
+        async with io.async_budgeted():
+            pass
+
+    async def main():
+        budget.acquire()
+        waiting = asyncio.create_task(request())
+        await asyncio.sleep(0.01)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        budget.release()
+        await asyncio.sleep(0.05)
+
+    asyncio.run(main())
+    assert budget.acquire(timeout=1)
+    budget.release()
+
+
+def test_sink_keeps_draining_after_errors(workdir):
+    sink = io.Sink()
+    (workdir / 'file').write_text('', encoding='utf-8')
+    sink.write(workdir / 'file' / 'log', 'lost')
+    with pytest.raises(OSError):
+        sink.flush()
+    sink.write(workdir / 'log', 'kept')
+    sink.flush()
+    assert (workdir / 'log').read_text(encoding='utf-8') == 'kept'
+    sink.close()
+
+
+def test_sink_flush_fails_without_writer():
+    class Dead(io.Sink):
+        def drain(self):
+            return
+
+    sink = Dead()
+    sink.thread.join()
+    sink.write(pathlib.Path('log'), 'lost')
+    with pytest.raises(RuntimeError):
+        sink.flush()
+
+
+def test_write_lines_after_queued_appends(workdir):
+    path = workdir / 'io' / '0.txt'
+    io.sink.write(path, 'appended\n')
+    io.write_lines(path, ['prompt\n', 'task\n'])
+    io.sink.write(path, 'info\n')
+    io.sink.flush()
+    assert io.read_lines(path) == ['prompt\n', 'task\n', 'info\n']
+
+
+def test_close_clients_of_running_loop(monkeypatch):
+    monkeypatch.setattr(io, 'async_clients', {})
+
+    async def main():
+        client = io.get_async_client('m')
+        assert io.get_async_client('m') is client
+        await io.close_clients()
+        return client
+
+    client = asyncio.run(main())
+    assert client.is_closed()
+    assert not io.async_clients
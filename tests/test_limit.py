@@ -0,0 +1,68 @@
+import types
+
+import httpx
+import openai
+import pytest
+
+from src import io
+from src.header import Call, Input
+from src.limit import Bucket, Limiter
+
+
+def test_bucket_spends_burst_then_waits():
+    bucket = Bucket(120, 60)
+    now = bucket.stamp
+    assert bucket.capacity == 120
+    assert bucket.reserve(120, now) == 0.0
+    assert bucket.reserve(2, now) == pytest.approx(1.0)
+    assert bucket.reserve(0, now + 1.0) == 0.0
+    bucket.refund(1000)
+    assert bucket.level == bucket.capacity
+
+
+def test_limiter_settles_estimate_against_usage():
+    limiter = Limiter(0, 600, 60)
+    assert limiter.reserve(500) == 0.0
+    limiter.settle(500, 100)
+    assert limiter.tokens.level == pytest.approx(500, abs=1)
+    assert limiter.reserve(500) == 0.0
+    assert limiter.reserve(100) > 0.0
+    assert str(limiter).startswith('3 calls')
+
+
+def test_failed_call_refunds_tokens(monkeypatch):
+    limiter = Limiter(0, 600, 60)
+    request = httpx.Request('POST', 'http://127.0.0.1:9/v1')
+
+    def create(**kwargs):
+        raise openai.APIConnectionError(request=request)
+
+    client = types.SimpleNamespace(
+        chat=types.SimpleNamespace(
+            completions=types.SimpleNamespace(create=create)
+        )
+    )
+    monkeypatch.setattr(io, 'backend', 'openai')
+    monkeypatch.setattr(io, 'get_limiter', lambda model: limiter)
+    monkeypatch.setattr(io, 'get_client', lambda model: client)
+    pl = types.SimpleNamespace(char=types.SimpleNamespace(model='m'), seat=0)
+    messages = [{'role': 'user', 'content': 'x' * 2000}]
+    with pytest.raises(openai.APIConnectionError):
+        io.input_ai(pl, messages, Call(0, '0', 'seer', '', '', 'm'))
+    assert limiter.tokens.level == pytest.approx(600)
+
+
+def test_calls_record_time_queued(monkeypatch):
+    limiter = Limiter(6000, 0, 0.01)
+    monkeypatch.setattr(io, 'get_limiter', lambda model: limiter)
+    pl = types.SimpleNamespace(
+        char=types.SimpleNamespace(model='m'),
+        seat=0,
+        tasks=[Input('speech')],
+        game=types.SimpleNamespace(usage={}),
+    )
+    calls = [Call(0, '0', 'seer', '', '', 'm') for _ in range(2)]
+    for call in calls:
+        io.input_ai(pl, [], call)
+    assert calls[0].queued < 0.005
+    assert calls[1].queued >= 0.009
@@ -0,0 +1,19 @@
+from src.header import Call
+from src.metrics import to_prometheus
+
+
+def test_prometheus_sums_per_label_set():
+    calls = [
+        Call(1, '0', 'seer', 'night 0', 'check', 'm', latency=0.25, queued=2),
+        Call(2, '0', 'seer', 'night 0', 'check', 'm', latency=0.5),
+        Call(3, '1', 'witch', 'night 0', 'cure', 'm', prompt_tokens=7),
+    ]
+    lines = to_prometheus(calls).splitlines()
+    seer = 'seat="0",role="seer",phase="night 0",model="m"'
+    assert f'werewolf_llm_calls_total{{{seer}}} 2' in lines
+    assert f'werewolf_llm_latency_seconds_total{{{seer}}} 0.75' in lines
+    assert f'werewolf_llm_queued_seconds_total{{{seer}}} 2.0' in lines
+    assert (
+        'werewolf_llm_prompt_tokens_total'
+        '{seat="1",role="witch",phase="night 0",model="m"} 7'
+    ) in lines
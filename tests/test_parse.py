@@ -0,0 +1,45 @@
+import types
+
+import pytest
+
+from src.header import FormatError, Input, Output
+from src.io import Scanner, parse
+
+tasks = [Input('speech'), Input('vote', ('1', '2', 'pass')), Input('notes')]
+answer = 'I trust seat 2 --- [Seat 1] --- none'
+
+
+def feed(text, size):
+    scanner = Scanner(types.SimpleNamespace(tasks=tasks))
+    for start in range(0, len(text), size):
+        scanner.feed(text[start : start + size])
+    return scanner
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 5, 100])
+def test_scanner_accepts_valid_stream(size):
+    scanner = feed(answer, size)
+    assert scanner.text == answer
+    assert scanner.closed == 2
+    pl = types.SimpleNamespace(tasks=tasks, results=[])
+    parse(pl, scanner.text)
+    assert pl.results == [
+        Output('i trust seat 2'),
+        Output('1'),
+        Output('none'),
+    ]
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 5])
+def test_scanner_aborts_on_first_invalid_field(size):
+    text = 'fine --- seat 7 --- ' + 'never read ' * 100
+    scanner = Scanner(types.SimpleNamespace(tasks=tasks))
+    with pytest.raises(FormatError, match='wrong value: seat 7'):
+        for start in range(0, len(text), size):
+            scanner.feed(text[start : start + size])
+    assert len(scanner.text) < 25
+
+
+def test_scanner_rejects_extra_fields():
+    with pytest.raises(FormatError, match='3 "---"'):
+        feed('a --- 1 --- b --- c', 4)
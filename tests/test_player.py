@@ -0,0 +1,97 @@
+import asyncio
+from collections import Counter
+import random
+
+import pytest
+
+from src import io
+from src.events import read
+from src.header import Char, State, user_data
+from src.player import Fool, Game, Guard, Hunter, Knight, Seer, Villager
+from src.player import Werewolf, WhiteWolf, Witch
+
+roles = [Villager] * 3 + [Werewolf] * 2 + [WhiteWolf, Seer, Witch]
+roles += [Hunter, Guard, Fool, Knight]
+wolfish = [Villager] * 3 + [Werewolf] * 3 + [WhiteWolf, Seer, Witch, Hunter]
+
+
+def play(roles, seed=0):
+    random.seed(seed)
+    chars = [Char(f'p{i}', 'ai', 'mock') for i in range(len(roles))]
+    game = Game(chars, roles)
+    asyncio.run(game.loop())
+    return game
+
+
+@pytest.mark.parametrize(
+    'roles',
+    [
+        [Werewolf] * 2 + [Seer, Witch],
+        [Werewolf] * 2 + [Villager] * 3,
+    ],
+)
+def test_partial_decided_at_start(roles, monkeypatch, workdir):
+    monkeypatch.setattr(user_data, 'win_condition', 'partial')
+    game = play(roles)
+    assert game.time.state == State.END
+    assert game.winner.faction == 'werewolf'
+    assert game.time.step == 0
+    (log,) = (workdir / 'io').glob('*.log')
+    assert 'werewolf win.' in log.read_text(encoding='utf-8')
+
+
+@pytest.mark.parametrize('seed', range(8))
+@pytest.mark.parametrize('setup', [roles, wolfish], ids=['full', 'wolfish'])
+@pytest.mark.parametrize('win_condition', ['all', 'partial'])
+def test_mock_game_runs_to_completion(
+    win_condition, setup, seed, monkeypatch, workdir
+):
+    monkeypatch.setattr(user_data, 'win_condition', win_condition)
+    monkeypatch.setattr(io, 'event_log', True)
+    game = play(setup, seed)
+    assert game.time.state == State.END
+    alive = [pl for pl in game.players if pl.life]
+    assert +game.factions == Counter(pl.role.faction for pl in alive)
+    factions = {pl.role.faction for pl in alive}
+    match game.winner.faction:
+        case 'villager':
+            assert factions == {'villager'}
+        case 'werewolf' if win_condition == 'all':
+            assert factions == {'werewolf'}
+        case 'werewolf':
+            categories = {
+                pl.role.category
+                for pl in alive
+                if pl.role.faction == 'villager'
+            }
+            assert 'werewolf' in factions and len(categories) <= 1
+        case winner:
+            assert winner == 'nobody' and not alive
+    (log,) = (workdir / 'io').glob('*.log')
+    assert f'{game.winner.faction} win.' in log.read_text(encoding='utf-8')
+    (events,) = (workdir / 'io').glob('*-events.jsonl')
+    assert len(list(read(events, ('call',)))) == len(game.metrics) > 0
+
+
+def test_games_close_their_files(monkeypatch, workdir):
+    monkeypatch.setattr(io, 'event_log', True)
+    for index in range(5):
+        monkeypatch.setattr(io, 'log_name', f'g{index}')
+        play(roles, index)
+        assert not io.sink.files
+    assert len(list((workdir / 'io').glob('g*.log'))) == 5
+
+
+class Early(Villager):
+    hours: list[int] = []
+
+    async def day(self):
+        self.hours.append(self.game.time.hour)
+
+
+def test_day_dispatch_only_to_day_roles(monkeypatch):
+    monkeypatch.setattr(Early, 'hours', [])
+    game = play(roles[:-1] + [Early], 0)
+    (early,) = (pl for pl in game.players if isinstance(pl, Early))
+    assert list(game.daytime) == [early]
+    assert Early.hours and set(Early.hours) <= set(Game.day_hours)
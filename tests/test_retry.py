@@ -0,0 +1,87 @@
+import asyncio
+import random
+
+import httpx
+import openai
+import pytest
+
+from src import io, mock
+from src.header import Input, Output
+
+tasks = [
+    Input('vote', ('1', '2', 'pass')),
+    Input('answer', ('yes', 'no')),
+    Input('target', ('3', '4')),
+    Input('speech'),
+]
+request = httpx.Request('POST', 'http://127.0.0.1:9/v1')
+
+
+def get_inputs(pl, replies, sync, monkeypatch):
+    sent, delays = [], []
+
+    def input_ai(pl, messages, call):
+        sent.append(messages)
+        reply = next(replies)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply or mock.complete(pl)
+
+    async def async_input_ai(pl, messages, call):
+        return input_ai(pl, messages, call)
+
+    def backoff(attempt):
+        delays.append(attempt)
+        return 0
+
+    monkeypatch.setattr(io, 'input_ai', input_ai)
+    monkeypatch.setattr(io, 'async_input_ai', async_input_ai)
+    monkeypatch.setattr(io, 'backoff', backoff)
+    pl.tasks = list(tasks)
+    if sync:
+        io.get_inputs(pl)
+    else:
+        asyncio.run(io.async_get_inputs(pl))
+    return sent, delays
+
+
+@pytest.mark.parametrize('sync', [True, False])
+def test_malformed_answers_fall_back(game, sync, monkeypatch):
+    random.seed(0)
+    pl = game.players[0]
+    replies = iter(['no separators'] * 10)
+    sent, delays = get_inputs(pl, replies, sync, monkeypatch)
+    assert len(sent) == io.max_attempts
+    assert delays == []
+    vote, yes_no, target, speech = pl.results
+    assert (vote, yes_no, speech) == (Output('pass'), Output('no'), Output(''))
+    assert target.output in ('3', '4')
+    assert len(game.metrics) == io.max_attempts
+    assert all(call.parse_failure for call in game.metrics)
+
+
+@pytest.mark.parametrize('sync', [True, False])
+def test_repair_turn_replaces_transcript(game, sync, monkeypatch):
+    pl = game.players[0]
+    for other in game.players[1:]:
+        other.boardcast(game.players, f'seat {other.seat} speaks')
+    replies = iter(['1 --- no separators', ''])
+    sent, delays = get_inputs(pl, replies, sync, monkeypatch)
+    assert len(sent[0]) == len(pl.messages) + 2
+    system, rejected, retry = sent[1]
+    assert system['role'] == 'system' and 'Output format' in system['content']
+    assert rejected == {'role': 'assistant', 'content': '1 --- no separators'}
+    assert retry['role'] == 'user' and 'rejected' in retry['content']
+    assert delays == []
+    assert len(pl.results) == len(tasks)
+
+
+@pytest.mark.parametrize('sync', [True, False])
+def test_api_errors_back_off(game, sync, monkeypatch):
+    pl = game.players[0]
+    error = openai.APIConnectionError(request=request)
+    replies = iter([error, error, ''])
+    sent, delays = get_inputs(pl, replies, sync, monkeypatch)
+    assert delays == [1, 2]
+    assert len(sent) == 3
+    assert sent[1] == sent[0] and sent[2] == sent[0]
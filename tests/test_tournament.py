@@ -0,0 +1,26 @@
+import sys
+import types
+
+import pytest
+
+from src import io
+
+
+@pytest.fixture
+def tournament(monkeypatch):
+    monkeypatch.setitem(
+        sys.modules, 'src.user_mod', types.ModuleType('src.user_mod')
+    )
+    import tournament
+
+    return tournament
+
+
+def test_workers_share_the_rate_limits(tournament, monkeypatch):
+    monkeypatch.setattr(io, 'budget', None)
+    monkeypatch.setattr(io, 'rate_limit', (60, 8000))
+    monkeypatch.setattr(io, 'rate_limits', {'m': (100, 0)})
+    tournament.init('budget', 4)
+    assert io.budget == 'budget'
+    assert io.rate_limit == (15, 2000)
+    assert io.rate_limits == {'m': (25, 0)}
@@ -0,0 +1,29 @@
+import asyncio
+import json
+
+import src.header  # src.trace is loaded through src.header
+from src.trace import Tracer
+
+
+def test_each_task_gets_its_own_track():
+    tracer = Tracer(True)
+
+    async def work():
+        with tracer.span('work'):
+            await asyncio.sleep(0)
+
+    async def main():
+        for batch in range(20):
+            await asyncio.gather(
+                *(
+                    asyncio.create_task(work(), name=f'task {batch}-{i}')
+                    for i in range(5)
+                )
+            )
+
+    asyncio.run(main())
+    events = json.loads(tracer.to_json())['traceEvents']
+    names = {e['tid']: e['args']['name'] for e in events if e['ph'] == 'M'}
+    spans = [e for e in events if e['ph'] == 'X']
+    assert len(names) == len(spans) == 100
+    assert len(set(names.values())) == 100
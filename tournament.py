@@ -0,0 +1,131 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import multiprocessing
+from multiprocessing.connection import Connection
+
+from src.player import *
+
+from src import io, user_mod
+
+
+def init(budget: Any, workers: int) -> None:
+    io.budget = budget
+    requests, tokens = io.rate_limit
+    io.rate_limit = (requests / workers, tokens / workers)
+    io.rate_limits = {
+        model: (requests / workers, tokens / workers)
+        for model, (requests, tokens) in io.rate_limits.items()
+    }
+
+
+def play(stamp: str, index: int) -> dict[str, Any]:
+    io.log_name = f'{stamp}-{index}'
+    start = time.perf_counter()
+    result: dict[str, Any] = {'game': index}
+    try:
+        chars = [
+            Char(char.name, 'ai', char.model, char.description)
+            for char in user_mod.chars
+        ]
+        game = Game(chars, user_mod.roles)
+        with open(os.devnull, 'w', encoding='utf-8') as devnull:
+            with contextlib.redirect_stdout(devnull):
+                asyncio.run(game.loop())
+        result |= {
+            'winner': game.winner.faction,
+            'roles': [pl.role.kind for pl in game.players],
+            'factions': [pl.role.faction for pl in game.players],
+            'models': [pl.char.model for pl in game.players],
+            'steps': game.time.step,
+            'tokens': game.usage['prompt_tokens']
+            + game.usage['completion_tokens'],
+        }
+    except Exception as e:
+        result['error'] = repr(e)
+    result['time'] = time.perf_counter() - start
+    return result
+
+
+def child(
+    conn: Connection, budget: Any, workers: int, stamp: str, index: int
+) -> None:
+    init(budget, workers)
+    conn.send(play(stamp, index))
+
+
+def run(
+    context: Any, budget: Any, workers: int, stamp: str, index: int
+) -> dict[str, Any]:
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(
+        target=child, args=(sender, budget, workers, stamp, index)
+    )
+    process.start()
+    sender.close()
+    try:
+        return receiver.recv()
+    except EOFError:
+        process.join()
+        return {
+            'game': index,
+            'error': f'worker exited with code {process.exitcode}',
+        }
+    finally:
+        receiver.close()
+        process.join()
+
+
+def summary(results: list[dict[str, Any]]) -> str:
+    finished = [result for result in results if 'error' not in result]
+    lines = [f'{len(results)} games, {len(results) - len(finished)} crashed']
+    if not finished:
+        return '\n'.join(lines)
+    winners = Counter(result['winner'] for result in finished)
+    for faction, num in winners.most_common():
+        lines.append(f'\t{faction} win: {num} ({num / len(finished):.1%})')
+    seats: Counter[str] = Counter()
+    wins: Counter[str] = Counter()
+    for result in finished:
+        for model, faction in zip(result['models'], result['factions']):
+            seats[model] += 1
+            wins[model] += faction == result['winner']
+    for model, num in seats.most_common():
+        lines.append(f'\t{model} seat win rate: {wins[model] / num:.1%}')
+    for key in ('steps', 'tokens', 'time'):
+        mean = sum(result[key] for result in finished) / len(finished)
+        lines.append(f'\tmean {key}: {mean:.1f}')
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+    workers = min(workers, games)
+    requests = int(sys.argv[3]) if len(sys.argv) > 3 else 16
+
+    stamp = f'tournament-{io.log_name}'
+    results: list[dict[str, Any]] = []
+    context = multiprocessing.get_context('spawn')
+    with context.Manager() as manager:
+        budget = manager.BoundedSemaphore(requests)
+        with ThreadPoolExecutor(workers) as pool:
+            futures = {
+                pool.submit(run, context, budget, workers, stamp, index): index
+                for index in range(games)
+            }
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {'game': futures[future], 'error': repr(e)}
+                results.append(result)
+                io.sink.write(
+                    pathlib.Path(f'io/{stamp}.jsonl'),
+                    json.dumps(result, ensure_ascii=False) + '\n',
+                )
+                print(
+                    f"game {result['game']}: "
+                    f"{result.get('winner') or result.get('error')}"
+                )
+    io.sink.flush()
+    print(summary(results))